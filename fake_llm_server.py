@@ -0,0 +1,133 @@
+"""Local stand-in for the OpenAI chat completions API, for load testing Pikabug offline.
+
+Run it, then point the bot (or its benchmark) at it:
+
+    python fake_llm_server.py --port 8089 --first-token 0.4 --token-delay 0.02 --error-rate 0.02
+    PIKA_LLM_BASE_URL=http://127.0.0.1:8089/v1 PIKA_LLM_API_KEY=fake python pika_bot.py --bench-chat 500 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+WORDS = (
+    "honestly that's a bold move but I respect the chaos keep going "
+    "you already know the answer just say it out loud and stop overthinking it"
+).split()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--first-token", type=float, default=0.5,
+                        help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02,
+                        help="seconds between streamed tokens")
+    parser.add_argument("--jitter", type=float, default=0.25,
+                        help="random +/- fraction applied to every delay")
+    parser.add_argument("--tokens", type=int, default=120,
+                        help="reply length in tokens (capped by the request's max_tokens)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="fraction of requests answered with a 429 and Retry-After")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--stall-rate", type=float, default=0.0,
+                        help="fraction of streams that stop sending mid-reply")
+    return parser.parse_args()
+
+class FakeCompletions:
+    def __init__(self, args):
+        self.args = args
+        self.requests = 0
+        self.injected = {"500": 0, "429": 0, "stall": 0}
+
+    def _delay(self, seconds):
+        jitter = self.args.jitter
+        return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+    def _error(self, status, message, headers=None):
+        body = {"error": {"message": message, "type": "fake_error", "code": status}}
+        return web.json_response(body, status=status, headers=headers)
+
+    async def handle(self, request):
+        self.requests += 1
+        payload = await request.json()
+        roll = random.random()
+        if roll < self.args.error_rate:
+            self.injected["500"] += 1
+            return self._error(500, "injected server error")
+        if roll < self.args.error_rate + self.args.rate_limit_rate:
+            self.injected["429"] += 1
+            return self._error(429, "injected rate limit",
+                               headers={"Retry-After": str(self.args.retry_after)})
+
+        length = min(self.args.tokens, payload.get("max_tokens") or self.args.tokens)
+        tokens = [random.choice(WORDS) + " " for _ in range(length)]
+        model = payload.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        await asyncio.sleep(self._delay(self.args.first_token))
+        if not payload.get("stream"):
+            await asyncio.sleep(self._delay(self.args.token_delay) * length)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": length, "total_tokens": length},
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        stall_at = None
+        if random.random() < self.args.stall_rate:
+            self.injected["stall"] += 1
+            stall_at = random.randrange(length) if length else 0
+        await send({"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            if i == stall_at:
+                # Hold the connection open without sending, like a hung upstream
+                await asyncio.sleep(3600)
+            await send({"content": token})
+            await asyncio.sleep(self._delay(self.args.token_delay))
+        await send({}, finish_reason="stop")
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def stats(self, request):
+        return web.json_response({"requests": self.requests, "injected": self.injected})
+
+def main():
+    args = parse_args()
+    completions = FakeCompletions(args)
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions.handle)
+    app.router.add_get("/stats", completions.stats)
+    web.run_app(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
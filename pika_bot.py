@@ -4,45 +4,568 @@ import asyncio
 import json 
 import os
 import traceback
+import cProfile
+import pstats
+import tempfile
+import logging
+import logging.handlers
+import queue
 import datetime
+import email.utils
 import time
 import string
+import math
 from collections import deque
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 load_dotenv()
-from openai import OpenAI
-from collections import defaultdict, deque
-from typing import Dict, List
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+from collections import OrderedDict, defaultdict, deque
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
 import re
+import gzip
+import shutil
+import sqlite3
+import contextlib
+import hashlib
+import mmap
+import struct
+import signal
+import sys
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from aiohttp import web
 
-# ─── Load valid English words ────────────────────────────────────
-with open("words_alpha.txt", encoding="utf-8") as f:
-    valid_words = set(line.strip().lower() for line in f if line.strip())
+try:
+    import zstandard
+except ImportError:  # optional; vent archives fall back to gzip
+    zstandard = None
+try:
+    import tiktoken
+except ImportError:  # listed in requirements.txt; without it token counts fall back to a chars/4 estimate
+    tiktoken = None
 
 # ─── Configuration ─────────────────────────────────────────────────
-# Session-only conversation history (not saved to disk)
-conversation_history = {}
-CONVERSATION_LIMIT = 50  # Keep last 50 messages per user in memory
-
 DISK_PATH = os.getenv("PIKA_DISK_MOUNT_PATH", "/var/data")
 PIKA_FILE = os.path.join(DISK_PATH, "pikapoints.json")
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID", "0"))
 assert os.path.isdir(DISK_PATH), f"Disk path {DISK_PATH} not found!"
 
+# ─── Word Game Data ───────────────────────────────────────────────
+WORDS_FILE = "words_alpha.txt"
+COMMON_WORDS_FILE = "common_words.txt"
+WORD_CACHE_FILE = os.getenv("PIKA_WORD_CACHE_FILE", os.path.join(DISK_PATH, "word_cache.bin"))
+WORD_CACHE_VERSION = 2
+MIN_WORDS_PER_PREFIX = 5
+MIN_RHYMES_PER_TARGET = 3
+
+class _WordView:
+    """Sequence view over a lexicon's words in a given order, for bisect"""
+    def __init__(self, lexicon, order=None, reverse=False):
+        self.lexicon = lexicon
+        self.order = order
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.lexicon)
+
+    def __getitem__(self, i):
+        word = self.lexicon.word_bytes(self.order[i] if self.order is not None else i)
+        return word[::-1] if self.reverse else word
+
+class Lexicon:
+    """Read-only sorted word list over a buffer (normally a shared mmap).
+
+    Layout: header, (n + 1) uint32 word offsets, n uint32 word indexes
+    sorted by reversed spelling, then the sorted words back to back.
+    """
+    HEADER = struct.Struct("<1sxxxII")  # byte order, word count, blob size
+    BYTE_ORDER = b"L" if sys.byteorder == "little" else b"B"
+
+    def __init__(self, buf, offset=0):
+        byte_order, count, blob_size = self.HEADER.unpack_from(buf, offset)
+        if byte_order != self.BYTE_ORDER:
+            raise ValueError("lexicon was built with a different byte order")
+        view = memoryview(buf)
+        start = offset + self.HEADER.size
+        self._buf = buf
+        self._count = count
+        self._offsets = view[start:start + 4 * (count + 1)].cast("I")
+        start += 4 * (count + 1)
+        self._by_suffix = view[start:start + 4 * count].cast("I")
+        self._blob_start = start + 4 * count
+        self.size = self._blob_start + blob_size - offset
+        self._sorted = _WordView(self)
+        self._reversed = _WordView(self, self._by_suffix, reverse=True)
+
+    @classmethod
+    def encode(cls, words: Iterable[str]) -> bytes:
+        """Serialize the given words into the lexicon layout"""
+        encoded = sorted({w.encode("utf-8") for w in words if w})
+        offsets = array("I", [0])
+        for w in encoded:
+            offsets.append(offsets[-1] + len(w))
+        by_suffix = array("I", sorted(range(len(encoded)), key=lambda i: encoded[i][::-1]))
+        return b"".join([
+            cls.HEADER.pack(cls.BYTE_ORDER, len(encoded), offsets[-1]),
+            offsets.tobytes(),
+            by_suffix.tobytes(),
+            *encoded,
+        ])
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.word(i)
+
+    def __contains__(self, word):
+        return self.contains(word)
+
+    def contains(self, word, lo=0, hi=None):
+        """Whether word is in the lexicon, optionally within index range [lo, hi)"""
+        if hi is None:
+            hi = self._count
+        key = word.encode("utf-8")
+        i = bisect_left(self._sorted, key, lo, hi)
+        return i < hi and self._sorted[i] == key
+
+    def word_length(self, i):
+        return self._offsets[i + 1] - self._offsets[i]
+
+    def word_bytes(self, i):
+        start = self._blob_start + self._offsets[i]
+        return self._buf[start:start + self._offsets[i + 1] - self._offsets[i]]
+
+    def word(self, i):
+        return self.word_bytes(i).decode("utf-8")
+
+    @staticmethod
+    def _range(view, key):
+        """Index range of entries in view that start with key"""
+        lo = bisect_left(view, key)
+        if not key:
+            return lo, len(view)
+        return lo, bisect_left(view, key[:-1] + bytes([key[-1] + 1]), lo)
+
+    def prefix_range(self, prefix) -> Tuple[int, int]:
+        """Index range [lo, hi) of words starting with prefix"""
+        return self._range(self._sorted, prefix.encode("utf-8"))
+
+    def words_in_range(self, lo, hi) -> List[str]:
+        return [self.word(i) for i in range(lo, hi)]
+
+    def suffix_range(self, suffix) -> Tuple[int, int]:
+        """Range [lo, hi) in suffix order of words ending with suffix"""
+        return self._range(self._reversed, suffix.encode("utf-8")[::-1])
+
+    def words_with_suffix(self, suffix) -> List[str]:
+        lo, hi = self.suffix_range(suffix)
+        return [self.word(self._by_suffix[i]) for i in range(lo, hi)]
+
+# A word rhymes with the target if it shares the last 3 letters or the
+# last 2. Every word sharing the last 3 also shares the last 2, so the
+# lexicon's suffix range for the 2-letter ending covers both rules.
+
+def get_rhyming_words(target_word, lexicon):
+    """Get words that rhyme with the target word"""
+    target_word = target_word.lower()
+    if len(target_word) < 3:
+        return set()
+    rhyming_words = {
+        w for w in lexicon.words_with_suffix(target_word[-2:])
+        if len(w) >= 3  # Minimum word length for rhyming
+    }
+    rhyming_words.discard(target_word)
+    return rhyming_words
+
+def count_rhyming_words(target_word, lexicon):
+    """Count rhymes for the target word without materialising them"""
+    target_word = target_word.lower()
+    if len(target_word) < 3:
+        return 0
+    ending = target_word[-2:]
+    lo, hi = lexicon.suffix_range(ending)
+    return hi - lo - (ending in lexicon) - (target_word in lexicon)
+
+def build_word_tables(lexicon, common_lines):
+    """Derive every word-game table from the lexicon and common_words.txt"""
+    # The lexicon is sorted, so the words sharing a 3-letter prefix form
+    # one contiguous index range [lo, hi).
+    prefix_map: Dict[str, Tuple[int, int]] = {}
+    for i, w in enumerate(lexicon):
+        # only consider words at least 3 letters long
+        if len(w) >= 3:
+            p = w[:3]               # extract the 3‐letter prefix
+            lo, _ = prefix_map.get(p, (i, i))
+            prefix_map[p] = (lo, i + 1)
+
+    common_words = [w.strip().lower() for w in common_lines if w.strip()]
+    return {
+        "prefix_map": prefix_map,
+        # Filter to "common" prefixes
+        "common_prefixes": [
+            p for p, (lo, hi) in prefix_map.items()
+            if hi - lo >= MIN_WORDS_PER_PREFIX
+        ],
+        # Unscramble words
+        "english_words": [w.strip() for w in common_lines if 5 <= len(w.strip()) <= 7],
+        # Word search words: 4-letter, 5-letter, and 6-letter
+        "four_letter_words": [w for w in common_words if len(w) == 4],
+        "five_letter_words": [w for w in common_words if len(w) == 5],
+        "six_letter_words": [w for w in common_words if len(w) == 6],
+        # Rhyme targets: only common 4-6 letter words with enough rhymes
+        "rhyme_targets": [
+            w for w in common_words
+            if 4 <= len(w) <= 6 and count_rhyming_words(w, lexicon) >= MIN_RHYMES_PER_TARGET
+        ],
+    }
+
+def build_prefix_order(lexicon, prefix_map):
+    """Lexicon indexes with each prefix's range re-sorted longest word first"""
+    order = array("I", range(len(lexicon)))
+    for lo, hi in prefix_map.values():
+        order[lo:hi] = array("I", sorted(range(lo, hi), key=lambda i: (-lexicon.word_length(i), i)))
+    return order
+
+def word_cache_key():
+    """Hash of the cache version and both source word lists"""
+    digest = hashlib.sha256(str(WORD_CACHE_VERSION).encode())
+    for path in (WORDS_FILE, COMMON_WORDS_FILE):
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.digest()
+
+class WordCache:
+    """Versioned cache of the lexicon plus every derived word-game table.
+
+    Layout: header, uint32 prefix order, lexicon section, JSON tables. The
+    cache is keyed by the hashes of the source word lists and rebuilt when
+    either one changes.
+    """
+    MAGIC = b"PIKAWC\0\0"
+    # magic, version, source key, prefix order size, lexicon size, tables size
+    HEADER = struct.Struct("<8sI4x32sQQQ")
+
+    def __init__(self, path, key):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, cached_key, order_size, lexicon_size, tables_size = self.HEADER.unpack_from(self._mm, 0)
+            if magic != self.MAGIC or version != WORD_CACHE_VERSION or cached_key != key:
+                raise ValueError(f"{path} is stale")
+            start = self.HEADER.size
+            self.prefix_order = memoryview(self._mm)[start:start + order_size].cast("I")
+            start += order_size
+            self.lexicon = Lexicon(self._mm, start)
+            start += lexicon_size
+            tables = json.loads(self._mm[start:start + tables_size])
+        except Exception:
+            self._file.close()
+            raise
+        tables["prefix_map"] = {p: tuple(r) for p, r in tables["prefix_map"].items()}
+        self.tables = tables
+
+    @classmethod
+    def build(cls, path, key):
+        """Rebuild the cache file from the source word lists"""
+        with open(WORDS_FILE, encoding="utf-8") as f:
+            lexicon_bytes = Lexicon.encode(line.strip().lower() for line in f)
+        with open(COMMON_WORDS_FILE) as f:
+            common_lines = f.readlines()
+        lexicon = Lexicon(lexicon_bytes)
+        tables = build_word_tables(lexicon, common_lines)
+        order_bytes = build_prefix_order(lexicon, tables["prefix_map"]).tobytes()
+        tables_bytes = json.dumps(tables).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cls.HEADER.pack(
+                cls.MAGIC, WORD_CACHE_VERSION, key,
+                len(order_bytes), len(lexicon_bytes), len(tables_bytes),
+            ))
+            f.write(order_bytes)
+            f.write(lexicon_bytes)
+            f.write(tables_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+def load_word_cache():
+    """Open the word cache, rebuilding it if missing or stale"""
+    key = word_cache_key()
+    try:
+        return WordCache(WORD_CACHE_FILE, key)
+    except (OSError, ValueError, struct.error):
+        WordCache.build(WORD_CACHE_FILE, key)
+        return WordCache(WORD_CACHE_FILE, key)
+
+if "--build-word-cache" in sys.argv:
+    load_word_cache()
+    print(f"Word cache is up to date: {WORD_CACHE_FILE}")
+    sys.exit(0)
+
+# Word data is loaded on first use rather than at import, so the gateway
+# connection comes up without waiting on the dictionaries.
+_word_cache = None
+_word_cache_lock = threading.Lock()
+
+def get_word_cache():
+    """Load the shared word cache once (blocking; call from a worker thread)"""
+    global _word_cache
+    with _word_cache_lock:
+        if _word_cache is None:
+            started = time.perf_counter()
+            _word_cache = load_word_cache()
+            print(f"Loaded word cache in {time.perf_counter() - started:.2f}s")
+        return _word_cache
+
+class LazyResource:
+    """A dataset loaded in a worker thread the first time it is awaited.
+
+    Concurrent first uses share the same load; a failed load is retried on
+    the next use.
+    """
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._future = None
+
+    @property
+    def loaded(self):
+        future = self._future
+        return future is not None and future.done() and not future.cancelled() and future.exception() is None
+
+    async def get(self):
+        # A cancelled load (e.g. during shutdown) is retried like a failed one
+        if self._future is None or self._future.cancelled():
+            self._future = asyncio.ensure_future(asyncio.to_thread(self._loader))
+        future = self._future
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            if self._future is future:
+                self._future = None
+            raise
+
+class AliasSampler:
+    """Walker/Vose alias table: O(n) setup, O(1) weighted draws"""
+    def __init__(self, items, weights):
+        n = len(items)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.items = list(items)
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def sample(self):
+        i = random.randrange(len(self.items))
+        return self.items[i] if random.random() < self._prob[i] else self.items[self._alias[i]]
+
+class PrefixGameData:
+    """Prefix game tables: weighted prefix draws and per-prefix word buckets"""
+    def __init__(self, lexicon, prefix_map, common_prefixes, prefix_order):
+        self.lexicon = lexicon
+        self.prefix_map = prefix_map
+        self.prefix_order = prefix_order
+        # Prefixes are drawn in proportion to how many words they start
+        self.sampler = AliasSampler(
+            common_prefixes, [prefix_map[p][1] - prefix_map[p][0] for p in common_prefixes]
+        )
+
+    def draw_prefix(self):
+        return self.sampler.sample()
+
+    def is_valid(self, prefix, word):
+        """Whether word is in the prefix's bucket"""
+        lo, hi = self.prefix_map[prefix]
+        return self.lexicon.contains(word, lo, hi)
+
+    def longest_word(self, prefix):
+        lo, _ = self.prefix_map[prefix]
+        return self.lexicon.word(self.prefix_order[lo])
+
+def _load_prefix_game_data():
+    cache = get_word_cache()
+    return PrefixGameData(
+        cache.lexicon, cache.tables["prefix_map"], cache.tables["common_prefixes"], cache.prefix_order
+    )
+
+def _load_wordsearch_data():
+    tables = get_word_cache().tables
+    return tables["four_letter_words"], tables["five_letter_words"], tables["six_letter_words"]
+
+def _load_rhyme_data():
+    cache = get_word_cache()
+    return cache.lexicon, cache.tables["rhyme_targets"]
+
+prefix_game_data = LazyResource("prefix game", _load_prefix_game_data)
+unscramble_data = LazyResource("unscramble", lambda: get_word_cache().tables["english_words"])
+wordsearch_data = LazyResource("wordsearch", _load_wordsearch_data)
+rhyme_data = LazyResource("rhyme", _load_rhyme_data)
+word_game_resources = [prefix_game_data, unscramble_data, wordsearch_data, rhyme_data]
+
+# Set PIKA_WARMUP_WORD_GAMES=1 to preload every word game dataset after on_ready
+WARMUP_WORD_GAMES = os.getenv("PIKA_WARMUP_WORD_GAMES", "0").lower() in ("1", "true", "yes")
+
+async def warm_up_word_games():
+    """Preload all word game datasets in the background"""
+    started = time.perf_counter()
+    results = await asyncio.gather(*(r.get() for r in word_game_resources), return_exceptions=True)
+    for resource, result in zip(word_game_resources, results):
+        if isinstance(result, Exception):
+            await logger.log_error(result, f"Word Data Warm-up Error ({resource.name})")
+    print(f"Word game warm-up finished in {time.perf_counter() - started:.2f}s")
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.reactions = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class PikaBot(commands.Bot):
+    async def close(self):
+        # Flush queued log embeds while the Discord connection is still open
+        await logger.close()
+        await super().close()
+
+bot = PikaBot(command_prefix='!', intents=intents)
 
 # ─── Logging System ─────────────────────────────────────────────────
 
+# Where DiscordLogger entries go: any of "discord" and "local" (rotating JSONL files)
+LOG_SINKS = {sink.strip() for sink in os.getenv("PIKA_LOG_SINKS", "discord,local").lower().split(",") if sink.strip()}
+LOG_DIR = os.getenv("PIKA_LOG_DIR", os.path.join(DISK_PATH, "logs"))
+# Local log files rotate at this size or age, whichever comes first
+LOG_MAX_BYTES = int(os.getenv("PIKA_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_MAX_AGE_HOURS = float(os.getenv("PIKA_LOG_MAX_AGE_HOURS", "24"))
+LOG_BACKUPS = int(os.getenv("PIKA_LOG_BACKUPS", "30"))
+LOG_COMPRESS = os.getenv("PIKA_LOG_COMPRESS", "1").lower() not in ("0", "false", "no")
+# Share of each event type kept locally, e.g. "command:guess=0.1,ai_usage=0.5".
+# A bare type ("command") covers all of its subtypes; unlisted types are kept in full.
+LOG_SAMPLE = os.getenv("PIKA_LOG_SAMPLE", "command:guess=0.1,command:hint=0.1")
+
+def parse_sample_rates(spec):
+    rates = {}
+    for entry in spec.split(","):
+        if "=" in entry:
+            event_type, rate = entry.split("=", 1)
+            rates[event_type.strip().lower()] = float(rate)
+    return rates
+
+def _gzip_rotate(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as out:
+        shutil.copyfileobj(src, out)
+    os.remove(source)
+
+class JsonlRotatingHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotating handler that also rotates once the current file is max_age seconds old"""
+    def __init__(self, filename, max_bytes, max_age, backups, compress=False):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.max_age = max_age
+        self.rollover_at = self._next_rollover()
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = _gzip_rotate
+
+    def _next_rollover(self):
+        try:
+            started = os.path.getmtime(self.baseFilename)
+        except OSError:
+            started = time.time()
+        return started + self.max_age
+
+    def shouldRollover(self, record):
+        if self.max_age and time.time() >= self.rollover_at and os.path.exists(self.baseFilename):
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.max_age
+
+class JsonlFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level and the record's event fields"""
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+        }
+        entry.update(getattr(record, "event", {}))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class EventSampler(logging.Filter):
+    """Keeps a configured share of each event type and notes the rate on kept records"""
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        if not event:
+            return True
+        event_type = event.get("type", "")
+        rate = self.rates.get(event_type, self.rates.get(event_type.split(":", 1)[0], 1.0))
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        event["sample_rate"] = rate
+        return True
+
+# Records are handed to a queue on the event loop and written by a listener thread
+event_log = logging.getLogger("pikabug.events")
+event_log.propagate = False
+event_log.setLevel(logging.INFO)
+log_listener = None
+if "local" in LOG_SINKS:
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _log_file_handler = JsonlRotatingHandler(
+        os.path.join(LOG_DIR, "pikabug.jsonl"), LOG_MAX_BYTES, LOG_MAX_AGE_HOURS * 3600,
+        LOG_BACKUPS, compress=LOG_COMPRESS,
+    )
+    _log_file_handler.setFormatter(JsonlFormatter())
+    _log_queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _log_queue_handler.addFilter(EventSampler(parse_sample_rates(LOG_SAMPLE)))
+    event_log.addHandler(_log_queue_handler)
+    log_listener = logging.handlers.QueueListener(_log_queue_handler.queue, _log_file_handler)
+    log_listener.start()
+
+# Log delivery: embeds are queued and sent in the background, up to 10 per message
+LOG_QUEUE_SIZE = int(os.getenv("PIKA_LOG_QUEUE_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("PIKA_LOG_FLUSH_INTERVAL", "2.0"))
+# Share of low-priority entries kept once the queue is more than half full
+LOG_LOW_PRIORITY_SAMPLE = float(os.getenv("PIKA_LOG_LOW_PRIORITY_SAMPLE", "0.25"))
+LOG_EMBEDS_PER_MESSAGE = 10
+LOG_CHARS_PER_MESSAGE = 6000
+# Seconds shutdown waits for queued embeds to reach Discord before recording the rest locally
+LOG_CLOSE_TIMEOUT = float(os.getenv("PIKA_LOG_CLOSE_TIMEOUT", "5"))
+
+# Errors go out first and are dropped last; routine command traffic is shed first
+LOG_PRIORITY_HIGH = 0
+LOG_PRIORITY_NORMAL = 1
+LOG_PRIORITY_LOW = 2
+
 class DiscordLogger:
     def __init__(self, bot):
         self.bot = bot
         self.log_channel = None
+        self._queues = {p: deque() for p in (LOG_PRIORITY_HIGH, LOG_PRIORITY_NORMAL, LOG_PRIORITY_LOW)}
+        self._wakeup = asyncio.Event()
+        self._sender = None
+        self._sending = None
+        self._closing = False
+        self.dropped: Dict[int, int] = defaultdict(int)
         
     async def initialize(self):
         """Initialize the log channel after bot is ready"""
@@ -53,10 +576,18 @@ class DiscordLogger:
                     print(f"Warning: Could not find log channel with ID {LOG_CHANNEL_ID}")
             except Exception as e:
                 print(f"Error initializing log channel: {e}")
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._run_sender())
+
+    @property
+    def queued(self):
+        return sum(len(q) for q in self._queues.values())
     
     async def log_command_usage(self, ctx, command_name, success=True, extra_info=""):
         """Log command usage with context"""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not success:
+            metrics.inc("pikabug_command_errors_total", command=command_name, guild=guild_label(ctx.guild), kind="reported")
     
         embed = discord.Embed(
             title=f"Command: {command_name}",
@@ -71,7 +602,11 @@ class DiscordLogger:
         if extra_info:
             embed.add_field(name="Details", value=extra_info[:1024], inline=False)
             
-        await self._send_log(embed)
+        self._record(
+            "command:" + command_name, user_id=ctx.author.id, guild_id=ctx.guild.id,
+            channel_id=ctx.channel.id, success=success, details=extra_info,
+        )
+        await self._send_log(embed, LOG_PRIORITY_LOW)
     
     async def log_error(self, error, context="General Error", extra_details=""):
         """Log errors with full traceback"""
@@ -91,12 +626,17 @@ class DiscordLogger:
             embed.add_field(name="Extra Details", value=extra_details[:1024], inline=False)
         
         # Add traceback as a separate field
-        tb = traceback.format_exc()
+        # From the error itself, so errors logged outside their except block keep their traceback
+        tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self._record(
+            "error", logging.ERROR, context=context, error_type=type(error).__name__,
+            message=str(error), details=extra_details, traceback=tb,
+        )
         if len(tb) > 1024:
             tb = tb[-1024:]  # Keep last 1024 chars of traceback
         embed.add_field(name="Traceback", value=f"```python\n{tb}\n```", inline=False)
         
-        await self._send_log(embed)
+        await self._send_log(embed, LOG_PRIORITY_HIGH)
     
     async def log_ai_usage(self, user_id, guild_id, prompt_length, response_length, success=True):
         """Log AI command usage"""
@@ -112,7 +652,11 @@ class DiscordLogger:
         embed.add_field(name="Response Length", value=f"{response_length} chars", inline=True)
         embed.add_field(name="Success", value="✅" if success else "❌", inline=True)
         
-        await self._send_log(embed)
+        self._record(
+            "ai_usage", user_id=user_id, guild_id=guild_id, prompt_chars=prompt_length,
+            response_chars=response_length, success=success,
+        )
+        await self._send_log(embed, LOG_PRIORITY_LOW)
     
     async def log_bot_event(self, event_type, message):
         """Log general bot events"""
@@ -124,7 +668,8 @@ class DiscordLogger:
         
         embed.add_field(name="Message", value=message[:1024], inline=False)
         
-        await self._send_log(embed)
+        self._record("bot_event", event=event_type, message=message)
+        await self._send_log(embed, LOG_PRIORITY_HIGH)
     
     async def log_game_result(self, game_type, winner_id, guild_id, extra_info=""):
         """Log game results"""
@@ -139,7 +684,8 @@ class DiscordLogger:
         if extra_info:
             embed.add_field(name="Details", value=extra_info[:1024], inline=False)
         
-        await self._send_log(embed)
+        self._record("game_result", game=game_type, winner_id=winner_id, guild_id=guild_id, details=extra_info)
+        await self._send_log(embed, LOG_PRIORITY_NORMAL)
     
     async def log_points_award(self, user_id, guild_id, points, reason, total_points):
         """Log points awards"""
@@ -155,24 +701,443 @@ class DiscordLogger:
         embed.add_field(name="Reason", value=reason, inline=True)
         embed.add_field(name="Total Points", value=str(total_points), inline=True)
         
-        await self._send_log(embed)
+        self._record(
+            "points_award", user_id=user_id, guild_id=guild_id, points=points,
+            reason=reason, total_points=total_points,
+        )
+        await self._send_log(embed, LOG_PRIORITY_NORMAL)
+    
+    async def log_rate_limit(self, user_id, guild_id, scope, action, wait):
+        """Log a request held back by a rate limit"""
+        embed = discord.Embed(
+            title="🚦 Rate Limit Hit",
+            color=0xff8c00,
+            timestamp=datetime.datetime.now()
+        )
+        
+        embed.add_field(name="User ID", value=str(user_id), inline=True)
+        embed.add_field(name="Guild ID", value=str(guild_id), inline=True)
+        embed.add_field(name="Limit", value=scope, inline=True)
+        embed.add_field(name="Action", value=action, inline=True)
+        embed.add_field(name="Wait", value=f"{wait:.1f}s", inline=True)
+        
+        self._record(
+            "rate_limit", logging.WARNING, user_id=user_id, guild_id=guild_id,
+            scope=scope, action=action, wait=round(wait, 3),
+        )
+        await self._send_log(embed, LOG_PRIORITY_NORMAL)
+    
+    async def log_loop_stall(self, duration, source, stack):
+        """Log the code that held the event loop past the lag threshold"""
+        self._record("loop_stall", logging.WARNING, duration=round(duration, 3), source=source, stack=stack)
+        
+        embed = discord.Embed(
+            title="🐢 Event Loop Stalled",
+            color=0xff8c00,
+            timestamp=datetime.datetime.now()
+        )
+        
+        embed.add_field(name="Blocked For", value=f"{duration:.2f}s", inline=True)
+        embed.add_field(name="Running", value=source, inline=True)
+        # Keep the innermost frames, which point at the blocking call
+        embed.add_field(name="Stack", value=f"```python\n{stack[-1000:]}\n```", inline=False)
+        
+        await self._send_log(embed, LOG_PRIORITY_HIGH)
     
-    async def _send_log(self, embed):
-        """Internal method to send log to Discord channel"""
+    def _record(self, event_type, level=logging.INFO, **fields):
+        """Write a structured entry to the local sink (sampled per event type)"""
+        if log_listener is not None:
+            event_log.log(level, event_type, extra={"event": {"type": event_type, **fields}})
+
+    async def _send_log(self, embed, priority=LOG_PRIORITY_NORMAL):
+        """Queue an embed for the background sender; never waits on Discord"""
+        if "discord" not in LOG_SINKS or self._closing:
+            return
+        queued = self.queued
+        if priority == LOG_PRIORITY_LOW and queued * 2 > LOG_QUEUE_SIZE:
+            # Under backpressure keep only a sample of routine entries
+            if random.random() >= LOG_LOW_PRIORITY_SAMPLE:
+                self.dropped[priority] += 1
+                return
+        if queued >= LOG_QUEUE_SIZE:
+            # Full: make room by shedding the oldest entry of a lower priority, if any
+            for lower in sorted(self._queues, reverse=True):
+                if lower <= priority:
+                    self.dropped[priority] += 1
+                    return
+                if self._queues[lower]:
+                    self._queues[lower].popleft()
+                    self.dropped[lower] += 1
+                    break
+        self._queues[priority].append(embed)
+        if self.queued >= LOG_EMBEDS_PER_MESSAGE:
+            self._wakeup.set()
+
+    def _next_batch(self):
+        """Take up to 10 queued embeds, highest priority first, within Discord's per-message size"""
+        batch, size = [], 0
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            while queue and len(batch) < LOG_EMBEDS_PER_MESSAGE:
+                embed_size = len(queue[0])
+                if batch and size + embed_size > LOG_CHARS_PER_MESSAGE:
+                    return batch
+                batch.append(queue.popleft())
+                size += embed_size
+        return batch
+
+    def _drop_notice(self):
+        """Embed summarising entries shed since the last notice, if any"""
+        if not self.dropped:
+            return None
+        names = {LOG_PRIORITY_HIGH: "high", LOG_PRIORITY_NORMAL: "normal", LOG_PRIORITY_LOW: "low"}
+        embed = discord.Embed(
+            title="⚠️ Log Entries Dropped",
+            color=0xff8c00,
+            timestamp=datetime.datetime.now()
+        )
+        for priority, count in sorted(self.dropped.items()):
+            embed.add_field(name=f"{names[priority].title()} priority", value=str(count), inline=True)
+        self._record("log_dropped", logging.WARNING, **{names[p]: c for p, c in self.dropped.items()})
+        self.dropped.clear()
+        return embed
+
+    async def _run_sender(self):
+        """Send queued embeds in batches whenever 10 are waiting or the flush interval passes"""
+        while not self._closing:
+            timed_out = False
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), LOG_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                timed_out = True
+            self._wakeup.clear()
+            notice = self._drop_notice()
+            if notice is not None:
+                self._queues[LOG_PRIORITY_HIGH].append(notice)
+            # Full batches go straight away; a partial one waits for the flush interval
+            while self.queued >= LOG_EMBEDS_PER_MESSAGE or ((timed_out or self._closing) and self.queued):
+                delivered = await self._deliver(self._next_batch())
+                if self._closing and not delivered:
+                    # Discord is unreachable; close() records the rest locally
+                    return
+
+    async def close(self):
+        """Deliver what's still queued before shutdown, recording locally whatever can't be sent"""
+        self._closing = True
+        notice = self._drop_notice()
+        if notice is not None:
+            self._queues[LOG_PRIORITY_HIGH].append(notice)
+        if self._sender is not None and not self._sender.done():
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._sender, LOG_CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The batch being sent when the wait ran out was cancelled with it
+                if self._sending:
+                    self._record_undelivered(self._sending)
+        while self.queued:
+            self._record_undelivered(self._next_batch())
+
+    def _record_undelivered(self, embeds):
+        for embed in embeds:
+            if log_listener is None:
+                print(f"Undelivered log: {embed.title}")
+                for field in embed.fields:
+                    print(f"{field.name}: {field.value}")
+            else:
+                self._record(
+                    "log_undelivered", logging.WARNING, title=embed.title,
+                    fields={field.name: field.value for field in embed.fields},
+                )
+
+    async def _deliver(self, embeds):
+        """Internal method to send a batch of logs to the Discord channel; True once sent"""
         if self.log_channel:
+            # Left set if the send is cancelled, so close() can record the batch
+            self._sending = embeds
             try:
-                await self.log_channel.send(embed=embed)
+                await self.log_channel.send(embeds=embeds)
             except Exception as e:
-                print(f"Failed to send log to Discord: {e}")
-        else:
-            print("Log channel not available - printing to console:")
-            print(f"Title: {embed.title}")
-            for field in embed.fields:
-                print(f"{field.name}: {field.value}")
+                print(f"Failed to send {len(embeds)} logs to Discord: {e}")
+                self._sending = None
+                if self._closing:
+                    self._record_undelivered(embeds)
+                return False
+            self._sending = None
+            return True
+        if self._closing:
+            self._record_undelivered(embeds)
+        elif log_listener is None:
+            # Nowhere durable to put it, so at least show it on the console
+            for embed in embeds:
+                print("Log channel not available - printing to console:")
+                print(f"Title: {embed.title}")
+                for field in embed.fields:
+                    print(f"{field.name}: {field.value}")
 
 # Initialize logger
 logger = DiscordLogger(bot)
 
+# ─── Metrics ─────────────────────────────────────────────────────────
+
+# Prometheus text endpoint, served on localhost only; 0 disables it
+METRICS_PORT = int(os.getenv("PIKA_METRICS_PORT", "9108"))
+METRICS_HOST = "127.0.0.1"
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Latency counts per LATENCY_BUCKETS bucket, plus an overflow bucket"""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Metrics:
+    """Counters, gauges and latency histograms keyed by name and labels.
+
+    Safe to update from worker threads, since the disk writes are timed
+    where they run.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = defaultdict(dict)
+        self._counters: Dict[str, Dict[tuple, float]] = defaultdict(dict)
+        self._gauges: Dict[str, object] = {}
+
+    def observe(self, name, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] = self._counters[name].get(key, 0) + amount
+
+    def gauge(self, name, read):
+        """Register read() to be sampled whenever metrics are rendered"""
+        self._gauges[name] = read
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def histograms(self, name, by=()):
+        """Histograms for name merged down to the labels in by, as {label values: Histogram}"""
+        merged: Dict[tuple, Histogram] = {}
+        with self._lock:
+            for key, histogram in self._histograms.get(name, {}).items():
+                labels = dict(key)
+                group = tuple(labels.get(label) for label in by)
+                merged.setdefault(group, Histogram()).merge(histogram)
+        return merged
+
+    def counters(self, name, by=()):
+        merged: Dict[tuple, float] = defaultdict(float)
+        with self._lock:
+            for key, value in self._counters.get(name, {}).items():
+                labels = dict(key)
+                merged[tuple(labels.get(label) for label in by)] += value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(LATENCY_BUCKETS, histogram.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_prom_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_bucket{_prom_labels(key, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{name}_sum{_prom_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_prom_labels(key)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_prom_labels(key)} {value:g}")
+        for name, read in sorted(self._gauges.items()):
+            try:
+                value = float(read())
+            except Exception:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        lines.append("# TYPE pikabug_uptime_seconds gauge")
+        lines.append(f"pikabug_uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def guild_label(guild):
+    return str(guild.id) if guild else "dm"
+
+metrics_runner = None
+
+async def start_metrics_server():
+    """Serve /metrics on localhost for Prometheus to scrape"""
+    global metrics_runner
+    if not METRICS_PORT or metrics_runner is not None:
+        return
+
+    async def handle_metrics(request):
+        return web.Response(
+            body=metrics.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    metrics_runner = runner
+
+# ─── Loop Lag Watchdog ───────────────────────────────────────────────
+
+# Loop lag worth reporting, how often the loop checks in, and the minimum gap between reports
+LOOP_LAG_THRESHOLD = float(os.getenv("PIKA_LOOP_LAG_THRESHOLD", "0.25"))
+LOOP_LAG_INTERVAL = float(os.getenv("PIKA_LOOP_LAG_INTERVAL", "0.05"))
+LOOP_LAG_REPORT_INTERVAL = float(os.getenv("PIKA_LOOP_LAG_REPORT_INTERVAL", "60"))
+
+# Outermost frame of the task running each command, kept by the command hooks on the
+# loop so the watchdog thread can pin a stall on a command from the stack alone
+command_frames: Dict[object, str] = {}
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+class LoopWatchdog:
+    """Measures event-loop lag and captures the stack of whatever blocks it.
+
+    A heartbeat task on the loop records how late each of its sleeps
+    wakes up. A helper thread watches the heartbeat; once it has been
+    silent for longer than the threshold, the thread grabs the loop
+    thread's stack and works out the command behind it from the frames
+    alone (the thread never calls into asyncio), and the heartbeat reports
+    them when the loop gets going again.
+    """
+    def __init__(self, threshold, interval, report_interval):
+        self.threshold = threshold
+        self.interval = interval
+        self.report_interval = report_interval
+        self.loop = None
+        self.last_beat = None
+        self.stalls = 0
+        self.suppressed = 0
+        self._last_report = 0.0
+        self._loop_thread_id = None
+        self._captured_beat = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self, loop):
+        if self.loop is not None:
+            return
+        self.loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="pikabug-loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    @staticmethod
+    def _source(frame):
+        """What the loop is running: a command name, else the coroutine or callback the loop called"""
+        while frame is not None:
+            command = command_frames.get(frame)
+            if command:
+                return f"!{command}"
+            caller = frame.f_back
+            if caller is not None and caller.f_code.co_filename.startswith(ASYNCIO_DIR) \
+                    and not frame.f_code.co_filename.startswith(ASYNCIO_DIR):
+                return frame.f_code.co_name
+            frame = caller
+        return "unknown"
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            beat = self.last_beat
+            if time.monotonic() - beat < self.threshold or beat == self._captured_beat:
+                continue
+            # Capture once per stall, while the blocking code is still on the stack
+            self._captured_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            source = self._source(frame)
+            with self._lock:
+                self._pending = (source, stack)
+
+    async def _heartbeat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self.last_beat - self.interval)
+            metrics.observe("pikabug_loop_lag_seconds", lag)
+            with self._lock:
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                await self._report(lag, *pending)
+
+    async def _report(self, lag, source, stack):
+        self.stalls += 1
+        metrics.inc("pikabug_loop_stalls_total", source=source)
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            self.suppressed += 1
+            return
+        self._last_report = now
+        if self.suppressed:
+            source = f"{source} (+{self.suppressed} stalls not reported)"
+            self.suppressed = 0
+        await logger.log_loop_stall(lag, source, stack)
+
+loop_watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD, LOOP_LAG_INTERVAL, LOOP_LAG_REPORT_INTERVAL)
+
 # ─── Hot Take System Variables ─────────────────────────────────────────────────
 HOT_TAKE_CHANNEL_ID = 1392813388286918696
 HOT_TAKE_FILE = os.path.join(os.path.dirname(__file__), "hot_takes.txt")
@@ -189,100 +1154,1495 @@ def load_hot_take_state():
     with open(HOT_TAKE_STATE_FILE, "r") as f:
         return json.load(f)
 
-def save_hot_take_state(state):
-    with open(HOT_TAKE_STATE_FILE, "w") as f:
-        json.dump(state, f)
-        f.flush()
-        os.fsync(f.fileno())
+def save_hot_take_state(state):
+    with metrics.timer("pikabug_save_duration_seconds", target="hot_take_state"), open(HOT_TAKE_STATE_FILE, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+hot_take_state = load_hot_take_state()
+
+# Shuffle order if needed
+if not hot_take_state.get("order") or len(hot_take_state["order"]) != len(hot_takes):
+    hot_take_state["order"] = list(range(len(hot_takes)))
+    random.shuffle(hot_take_state["order"])
+    save_hot_take_state(hot_take_state)
+
+# ─── Bot Events ─────────────────────────────────────────────────
+
+@bot.event
+async def on_ready():
+    """Bot startup event"""
+    await logger.initialize()
+    await logger.log_bot_event("Bot Started", f"Pikabug is online! Logged in as {bot.user}")
+    print(f'{bot.user} has connected to Discord!')
+    print(f'Disk path: {DISK_PATH}')
+    print(f'Disk path exists: {os.path.exists(DISK_PATH)}')
+    if os.path.exists(DISK_PATH):
+        print(f'Files in disk: {os.listdir(DISK_PATH)}')
+    
+    # Start the hot take task if not already running
+    if not send_hot_take.is_running():
+        send_hot_take.start()
+
+    if not flush_pikapoints.is_running():
+        flush_pikapoints.start()
+    if not flush_vents.is_running():
+        flush_vents.start()
+    if not compact_vents.is_running():
+        compact_vents.start()
+    if not expire_conversations.is_running():
+        expire_conversations.start()
+
+    loop_watchdog.start(asyncio.get_running_loop())
+
+    try:
+        await start_metrics_server()
+    except OSError as e:
+        await logger.log_error(e, "Metrics Server Error", f"Port: {METRICS_PORT}")
+
+    if WARMUP_WORD_GAMES and not all(r.loaded for r in word_game_resources):
+        asyncio.create_task(warm_up_word_games())
+    if _token_encoding is None:
+        asyncio.create_task(load_token_encoding())
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.pika_started = time.perf_counter()
+    ctx.pika_frame = asyncio.current_task().get_coro().cr_frame
+    command_frames[ctx.pika_frame] = ctx.command.qualified_name
+
+@bot.after_invoke
+async def record_command_timing(ctx):
+    """Record how long the command took, whether or not it succeeded"""
+    command_frames.pop(getattr(ctx, "pika_frame", None), None)
+    started = getattr(ctx, "pika_started", None)
+    if started is not None:
+        metrics.observe(
+            "pikabug_command_duration_seconds", time.perf_counter() - started,
+            command=ctx.command.qualified_name, guild=guild_label(ctx.guild),
+        )
+
+@bot.event
+async def on_command_error(ctx, error):
+    """Global error handler"""
+    metrics.inc(
+        "pikabug_command_errors_total", command=ctx.command.qualified_name if ctx.command else "unknown",
+        guild=guild_label(ctx.guild), kind="unhandled",
+    )
+    await logger.log_error(
+        error, 
+        f"Command Error in {ctx.command.name if ctx.command else 'Unknown Command'}", 
+        f"User: {ctx.author.id}, Guild: {ctx.guild.id if ctx.guild else 'DM'}"
+    )
+    
+    # Send user-friendly error message
+    if isinstance(error, commands.CommandNotFound):
+        await ctx.send("❌ Command not found. Use `!pikahelp` to see available commands.")
+    elif isinstance(error, commands.MissingRequiredArgument):
+        await ctx.send(f"❌ Missing required argument. Check the command usage with `!pikahelp`.")
+    else:
+        await ctx.send("❌ An error occurred while processing your command.")
+
+# ─── PikaPoints Data ─────────────────────────────────────────────────
+
+# PikaPoints reward values
+PROMPT_POINTS = 15
+VENT_POINTS = 10
+PREFIXGAME_POINTS = 5
+UNSCRAMBLE_POINTS = 5
+WORKSHOP_POINTS = 20
+WORDSEARCH_POINTS = 5
+RHYME_POINTS = 5
+
+# ─── Chat Provider ──────────────────────────────────────────────────
+
+# Seconds a single !chat completion may take before it is abandoned
+CHAT_TIMEOUT = float(os.getenv("PIKA_CHAT_TIMEOUT", "60"))
+
+# PIKA_LLM_PROVIDER selects the completion backend. "openai" speaks the OpenAI
+# chat completions protocol, so PIKA_LLM_BASE_URL can point it at any
+# compatible server, including fake_llm_server.py for offline load tests
+LLM_PROVIDER = os.getenv("PIKA_LLM_PROVIDER", "openai").lower()
+LLM_MODEL = os.getenv("PIKA_LLM_MODEL", "gpt-4o")
+LLM_BASE_URL = os.getenv("PIKA_LLM_BASE_URL") or None
+LLM_API_KEY = os.getenv("PIKA_LLM_API_KEY") or os.getenv("OPENAI_API_KEY")
+LLM_MAX_TOKENS = int(os.getenv("PIKA_LLM_MAX_TOKENS", "1000"))
+LLM_TEMPERATURE = float(os.getenv("PIKA_LLM_TEMPERATURE", "1.0"))
+
+class ChatProvider(ABC):
+    """A chat completion backend.
+
+    Keyword params override the provider's configured defaults (model,
+    max_tokens, temperature) for a single call.
+    """
+    @abstractmethod
+    def stream(self, messages, **params) -> AsyncIterator[str]:
+        """Yield the reply's text as it is generated (an async generator)"""
+
+    @abstractmethod
+    async def complete(self, messages, **params) -> str:
+        """The whole reply's text"""
+
+# Connection pool for the completion API; connections are kept alive between requests
+LLM_MAX_CONNECTIONS = int(os.getenv("PIKA_LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("PIKA_LLM_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("PIKA_LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("PIKA_LLM_CONNECT_TIMEOUT", "5"))
+# Seconds one attempt may take to start answering, and a stream may go quiet
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("PIKA_LLM_ATTEMPT_TIMEOUT", "20"))
+LLM_STREAM_IDLE_TIMEOUT = float(os.getenv("PIKA_LLM_STREAM_IDLE_TIMEOUT", "15"))
+# Retries after a failed attempt, spaced by jittered exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("PIKA_LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("PIKA_LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("PIKA_LLM_BACKOFF_MAX", "8"))
+# Consecutive failed attempts that open the circuit, and seconds before it probes again
+LLM_BREAKER_FAILURES = int(os.getenv("PIKA_LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("PIKA_LLM_BREAKER_COOLDOWN", "30"))
+
+class ProviderUnavailable(Exception):
+    """The provider's circuit is open, so the call was refused without trying"""
+    def __init__(self, retry_in):
+        super().__init__(f"Chat provider unavailable, retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Fails fast once an upstream keeps failing.
+
+    Opens after threshold consecutive failures. Once the cooldown has
+    passed a single probe is let through (half-open); its success closes
+    the circuit and its failure reopens it for another cooldown.
+    """
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_attempt(self):
+        """Raise ProviderUnavailable unless an attempt may go ahead"""
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.cooldown - time.monotonic()
+        if remaining > 0:
+            raise ProviderUnavailable(remaining)
+        if self._probing:
+            raise ProviderUnavailable(1)
+        self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_abandoned(self):
+        """An attempt told us nothing about upstream health (cancelled, or a bad request); let another probe through"""
+        self._probing = False
+
+def is_retryable(error):
+    """Timeouts, connection failures, 408/409/429 and 5xx are worth another attempt"""
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+def retry_after(error):
+    """Seconds the server asked us to wait before retrying, if it said"""
+    if not isinstance(error, APIStatusError):
+        return None
+    headers = error.response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, server_delay=None):
+    """Full-jitter exponential backoff, never sooner than the server asked for"""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    if server_delay is not None:
+        delay = max(delay, server_delay)
+    return delay
+
+class OpenAIChatProvider(ChatProvider):
+    def __init__(self, model, api_key, base_url=None, timeout=None, **defaults):
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT),
+        )
+        # Async client, so a slow completion never blocks the loop. Retries
+        # are ours, so the circuit breaker sees every attempt.
+        self.client = AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0
+        )
+        self.defaults = {"model": model, **defaults}
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN)
+        self.retries = 0
+
+    async def _attempt(self, start):
+        """Await start() under the per-attempt deadline, retrying failures with backoff"""
+        attempt = 0
+        while True:
+            self.breaker.before_attempt()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(start(), LLM_ATTEMPT_TIMEOUT)
+            except asyncio.CancelledError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                metrics.observe("pikabug_llm_attempt_duration_seconds", time.perf_counter() - started, outcome="error")
+                if not is_retryable(e):
+                    # The request itself was bad; that says nothing about upstream health
+                    self.breaker.record_abandoned()
+                    raise
+                self.breaker.record_failure()
+                delay = backoff_delay(attempt, retry_after(e))
+                if attempt >= LLM_MAX_RETRIES or delay > CHAT_TIMEOUT:
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            metrics.observe("pikabug_llm_attempt_duration_seconds", time.perf_counter() - started, outcome="ok")
+            self.breaker.record_success()
+            return result
+
+    async def stream(self, messages, **params):
+        async def open_stream():
+            # An attempt only counts as started once the first chunk arrives
+            stream = await self.client.chat.completions.create(
+                messages=messages, stream=True, **{**self.defaults, **params}
+            )
+            chunks = stream.__aiter__()
+            try:
+                return stream, chunks, await chunks.__anext__()
+            except StopAsyncIteration:
+                return stream, chunks, None
+            except BaseException:
+                await stream.close()
+                raise
+
+        stream, chunks, chunk = await self._attempt(open_stream)
+        try:
+            while chunk is not None:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), LLM_STREAM_IDLE_TIMEOUT)
+                except StopAsyncIteration:
+                    break
+        except (asyncio.TimeoutError, APIConnectionError):
+            # Half a reply can't be retried, but a stalled stream still counts against the upstream
+            self.breaker.record_failure()
+            raise
+        finally:
+            await stream.close()
+
+    async def complete(self, messages, **params):
+        response = await self._attempt(lambda: self.client.chat.completions.create(
+            messages=messages, **{**self.defaults, **params}
+        ))
+        return response.choices[0].message.content or ""
+
+def create_chat_provider():
+    if LLM_PROVIDER != "openai":
+        raise ValueError(f"Unknown PIKA_LLM_PROVIDER: {LLM_PROVIDER}")
+    return OpenAIChatProvider(
+        LLM_MODEL, LLM_API_KEY, base_url=LLM_BASE_URL, timeout=CHAT_TIMEOUT,
+        max_tokens=LLM_MAX_TOKENS, temperature=LLM_TEMPERATURE,
+    )
+
+chat_provider = create_chat_provider()
+
+# ─── PikaPoints Storage ─────────────────────────────────────────────
+
+# PIKA_POINTS_BACKEND selects where pika_data is persisted: "json" (the
+# whole-file pikapoints.json) or "sqlite" (one row per user in WAL mode)
+POINTS_BACKEND = os.getenv("PIKA_POINTS_BACKEND", "json").lower()
+PIKA_DB_FILE = os.path.join(DISK_PATH, "pikapoints.db")
+
+class PointsBackend(ABC):
+    """Persistence for pika_data ({guild_id: {user_id: record}}).
+
+    snapshot() runs on the event loop and copies whatever write() needs;
+    write() then runs in a worker thread without touching live records.
+    """
+    @abstractmethod
+    def load(self) -> dict:
+        """Read every stored record"""
+
+    @abstractmethod
+    def snapshot(self, data: dict, dirty: Set[Tuple[str, str]]):
+        """Copy what write() needs for the dirty (guild_id, user_id) pairs"""
+
+    @abstractmethod
+    def write(self, snapshot):
+        """Persist a snapshot; runs in a worker thread"""
+
+    def close(self):
+        pass
+
+def upgrade_legacy_records(data):
+    """Turn legacy bare-integer balances into records, in place, so every path can treat them as dicts"""
+    for users in data.values():
+        for user_id, record in users.items():
+            if not isinstance(record, dict):
+                users[user_id] = {"points": record}
+    return data
+
+class JsonPointsBackend(PointsBackend):
+    """Stores every guild and user in a single JSON file"""
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            with open(self.path, "w") as f:
+                json.dump({}, f)
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def snapshot(self, data, dirty):
+        # The file format has no per-record layout, so copy all of it
+        return {guild_id: {user_id: dict(record) for user_id, record in users.items()}
+                for guild_id, users in data.items()}
+
+    def write(self, snapshot):
+        # Write to a temp file and rename so a crash never leaves a torn file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+class SqlitePointsBackend(PointsBackend):
+    """Stores one row per (guild, user) in a WAL-mode SQLite database"""
+    def __init__(self, path):
+        # Writes come from worker threads, serialized by PointsWriter
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pikapoints ("
+                " guild_id TEXT NOT NULL,"
+                " user_id TEXT NOT NULL,"
+                " points INTEGER NOT NULL,"
+                " record TEXT NOT NULL,"
+                " PRIMARY KEY (guild_id, user_id)"
+                ") WITHOUT ROWID"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def migrate_from_json(self, json_path):
+        """Import pikapoints.json once; later startups skip it"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        data = JsonPointsBackend(json_path).load() if os.path.exists(json_path) else {}
+        upgrade_legacy_records(data)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pikapoints VALUES (?, ?, ?, ?)",
+                (
+                    (guild_id, user_id, record.get("points", 0), json.dumps(record))
+                    for guild_id, users in data.items()
+                    for user_id, record in users.items()
+                ),
+            )
+            self.conn.execute("INSERT INTO meta VALUES ('json_migrated', ?)", (datetime.datetime.utcnow().isoformat(),))
+        print(f"Migrated {sum(len(u) for u in data.values())} PikaPoints records from {json_path}")
+
+    def load(self):
+        data = {}
+        for guild_id, user_id, record in self.conn.execute("SELECT guild_id, user_id, record FROM pikapoints"):
+            data.setdefault(guild_id, {})[user_id] = json.loads(record)
+        return data
+
+    def snapshot(self, data, dirty):
+        rows = []
+        for guild_id, user_id in dirty:
+            record = data[guild_id][user_id]
+            rows.append((guild_id, user_id, record.get("points", 0), json.dumps(record)))
+        return rows
+
+    def write(self, snapshot):
+        # Every dirty row goes out in one transaction (group commit)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO pikapoints VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, user_id) DO UPDATE SET points = excluded.points, record = excluded.record",
+                snapshot,
+            )
+
+    def close(self):
+        self.conn.close()
+
+def create_points_backend():
+    if POINTS_BACKEND == "sqlite":
+        backend = SqlitePointsBackend(PIKA_DB_FILE)
+        backend.migrate_from_json(PIKA_FILE)
+        return backend
+    if POINTS_BACKEND != "json":
+        raise ValueError(f"Unknown PIKA_POINTS_BACKEND: {POINTS_BACKEND}")
+    return JsonPointsBackend(PIKA_FILE)
+
+# Maximum seconds of PikaPoints changes that can be lost if the host dies
+POINTS_FLUSH_INTERVAL = float(os.getenv("PIKA_POINTS_FLUSH_INTERVAL", "2.0"))
+# How often ledger events are folded into a pika_data snapshot
+POINTS_COMPACT_INTERVAL = float(os.getenv("PIKA_POINTS_COMPACT_INTERVAL", "300"))
+LEDGER_DIR = os.path.join(DISK_PATH, "pikapoints_ledger")
+# Days folded ledger segments are kept as an audit trail; 0 keeps them forever
+LEDGER_RETENTION_DAYS = float(os.getenv("PIKA_POINTS_LEDGER_RETENTION_DAYS", "30"))
+
+class PointsLedger:
+    """Append-only log of PikaPoints events.
+
+    Every event carries the user's full record after the change, so
+    replaying is idempotent. New events go to current.jsonl; compaction
+    rotates it to segment-<n>.jsonl and, once the snapshot holding those
+    events is written, renames it to folded-<n>.jsonl, which is kept as an
+    audit trail for retention_days and never replayed.
+    """
+    def __init__(self, directory, retention_days=0):
+        self.directory = directory
+        self.retention_days = retention_days
+        os.makedirs(directory, exist_ok=True)
+        self.current_path = os.path.join(directory, "current.jsonl")
+        self._trim_torn_tail(self.current_path)
+        self._file = open(self.current_path, "a", encoding="utf-8")
+        self._unsynced = False
+        self._retired = []
+
+    @staticmethod
+    def _trim_torn_tail(path, chunk=4096):
+        """Cut a partial last line left by a crash, so the next event starts on its own line"""
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                start = max(0, pos - chunk)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline != -1:
+                    pos = start + newline + 1
+                    break
+                pos = start
+            if pos != end:
+                f.truncate(pos)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _unfolded_segments(self):
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".jsonl")
+        )
+
+    def replay(self, data: dict) -> Set[Tuple[str, str]]:
+        """Apply events not yet folded into a snapshot; returns the keys touched"""
+        touched = set()
+        for path in self._unfolded_segments() + [self.current_path]:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    data.setdefault(event["guild"], {})[event["user"]] = event["record"]
+                    touched.add((event["guild"], event["user"]))
+        return touched
+
+    def append(self, guild_id, user_id, event_type, delta, record, actor=None):
+        event = {
+            "ts": datetime.datetime.utcnow().isoformat(),
+            "guild": guild_id,
+            "user": user_id,
+            "type": event_type,
+            "delta": delta,
+            "record": record,
+        }
+        if actor is not None:
+            event["actor"] = actor
+        self._file.write(json.dumps(event) + "\n")
+        # Hand the line to the OS now; fsync is batched by sync()
+        self._file.flush()
+        self._unsynced = True
+
+    def sync(self):
+        """fsync appended events (blocking; runs in a worker thread)"""
+        if self._unsynced:
+            self._unsynced = False
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> List[str]:
+        """Start a new current.jsonl; returns every segment awaiting a snapshot"""
+        self._file.flush()
+        self._retired.append(self._file)
+        os.replace(self.current_path, os.path.join(self.directory, f"segment-{time.time_ns():020d}.jsonl"))
+        self._file = open(self.current_path, "a", encoding="utf-8")
+        self._unsynced = False
+        return self._unfolded_segments()
+
+    def fold(self, segments):
+        """Mark segments as captured by a written snapshot"""
+        while self._retired:
+            retired = self._retired.pop()
+            os.fsync(retired.fileno())
+            retired.close()
+        for path in segments:
+            folded = os.path.basename(path).replace("segment-", "folded-", 1)
+            os.replace(path, os.path.join(self.directory, folded))
+        self.prune()
+
+    def prune(self):
+        """Delete folded segments older than the retention window"""
+        if not self.retention_days:
+            return
+        cutoff = time.time_ns() - int(self.retention_days * 86400 * 1e9)
+        for name in os.listdir(self.directory):
+            if not (name.startswith("folded-") and name.endswith(".jsonl")):
+                continue
+            try:
+                rotated_at = int(name[len("folded-"):-len(".jsonl")])
+            except ValueError:
+                continue
+            if rotated_at < cutoff:
+                os.remove(os.path.join(self.directory, name))
+
+    def close(self):
+        for retired in self._retired:
+            retired.close()
+        self._file.close()
+
+class PointsWriter:
+    """Compacts the points ledger into pika_data snapshots.
+
+    Changes are appended to the ledger right away and only mark records
+    dirty; flush() writes everything dirtied since the last flush as one
+    snapshot off the event loop, then folds the ledger segments it covers.
+    """
+    def __init__(self, backend, ledger, data):
+        self.backend = backend
+        self.ledger = ledger
+        self.data = data
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._inflight: Set[Tuple[str, str]] = set()
+        self._write_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self.last_flush = time.monotonic()
+
+    def mark_dirty(self, guild_id: str, user_id: str):
+        self._dirty.add((guild_id, user_id))
+
+    @property
+    def pending(self):
+        return len(self._dirty) + len(self._inflight)
+
+    def _write(self, snapshot, segments):
+        with self._write_lock, metrics.timer("pikabug_save_duration_seconds", target="pikapoints"):
+            self.backend.write(snapshot)
+            self.ledger.fold(segments)
+
+    async def flush(self):
+        async with self._flush_lock:
+            self.last_flush = time.monotonic()
+            if not self._dirty:
+                return
+            self._inflight, self._dirty = self._dirty, set()
+            snapshot = self.backend.snapshot(self.data, self._inflight)
+            segments = self.ledger.rotate()
+            try:
+                await asyncio.to_thread(self._write, snapshot, segments)
+            except Exception:
+                self._dirty |= self._inflight
+                raise
+            finally:
+                self._inflight = set()
+
+    def flush_sync(self):
+        """Final blocking flush, used at shutdown after the loop has stopped"""
+        self._dirty |= self._inflight
+        self._inflight = set()
+        if self._dirty:
+            snapshot = self.backend.snapshot(self.data, self._dirty)
+            self._write(snapshot, self.ledger.rotate())
+            self._dirty = set()
+
+points_backend = create_points_backend()
+pika_data = upgrade_legacy_records(points_backend.load())
+points_ledger = PointsLedger(LEDGER_DIR, LEDGER_RETENTION_DAYS)
+points_writer = PointsWriter(points_backend, points_ledger, pika_data)
+# Recover changes made after the last snapshot
+for _guild_id, _user_id in points_ledger.replay(pika_data):
+    points_writer.mark_dirty(_guild_id, _user_id)
+
+def record_points_event(guild_id: str, user_id: str, event_type: str, delta: int, actor=None):
+    """Log a change get_user_record callers made to a record and schedule it for the next snapshot"""
+    record = pika_data[guild_id][user_id]
+    points_ledger.append(guild_id, user_id, event_type, delta, dict(record), actor)
+    points_writer.mark_dirty(guild_id, user_id)
+    board = leaderboards.get(guild_id)
+    if board is not None:
+        board.update(user_id, record["points"])
+
+@tasks.loop(seconds=POINTS_FLUSH_INTERVAL)
+async def flush_pikapoints():
+    """Sync the points ledger and periodically compact it in the background"""
+    try:
+        with metrics.timer("pikabug_save_duration_seconds", target="pikapoints_ledger"):
+            await asyncio.to_thread(points_ledger.sync)
+        if time.monotonic() - points_writer.last_flush >= POINTS_COMPACT_INTERVAL:
+            await points_writer.flush()
+    except Exception as e:
+        await logger.log_error(e, "PikaPoints Flush Error")
+
+WORKSHOP_CHANNEL_ID = 1392093043800412160
+
+def get_user_record(guild_id: str, user_id: str):
+    guild = pika_data.setdefault(guild_id, {})
+    return guild.setdefault(user_id, {
+        "points": 0,
+        "prompt_submissions": 0,
+        "vent_submissions": 0,
+        "workshop_submissions": 0,
+        "prefixgame_submissions": 0,
+        "unscramble_submissions": 0,
+        "wordsearch_submissions": 0,
+    })
+
+# Every counter a record can carry; older records may lack some of them
+USER_VIEW_DEFAULTS = {
+    "points": 0,
+    "prompt_submissions": 0,
+    "vent_submissions": 0,
+    "workshop_submissions": 0,
+    "prefixgame_submissions": 0,
+    "unscramble_submissions": 0,
+    "wordsearch_submissions": 0,
+    "rhyme_submissions": 0,
+    "admin_granted": 0,
+    "admin_removed": 0,
+    "admin_set": 0,
+}
+
+def get_user_view(guild_id: str, user_id: str) -> dict:
+    """Read-only copy of a user's record with every counter filled in.
+
+    Reads come from pika_data in memory, which is the source of truth that
+    the ledger and snapshots are written from, so they always include
+    changes that have not reached disk yet. Unlike get_user_record this
+    never creates a record.
+    """
+    record = pika_data.get(guild_id, {}).get(user_id, {})
+    return {**USER_VIEW_DEFAULTS, **record}
+
+# ─── Leaderboard Index ─────────────────────────────────────────────
+
+class _RankNode:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.size = 1
+
+def _size(node):
+    return node.size if node else 0
+
+class RankIndex:
+    """Order-statistics treap of one guild's users, best first.
+
+    Keys are (-points, user_id), so ties are broken by user id. Updates,
+    rank lookups and k-th lookups are all O(log n) expected.
+    """
+    def __init__(self):
+        self._root = None
+        self._points: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def _merge(self, a, b):
+        if not a or not b:
+            return a or b
+        if a.priority > b.priority:
+            a.right = self._merge(a.right, b)
+            a.size = 1 + _size(a.left) + _size(a.right)
+            return a
+        b.left = self._merge(a, b.left)
+        b.size = 1 + _size(b.left) + _size(b.right)
+        return b
+
+    def _split(self, node, key):
+        """Split into (keys < key, keys >= key)"""
+        if not node:
+            return None, None
+        if node.key < key:
+            node.right, right = self._split(node.right, key)
+            node.size = 1 + _size(node.left) + _size(node.right)
+            return node, right
+        left, node.left = self._split(node.left, key)
+        node.size = 1 + _size(node.left) + _size(node.right)
+        return left, node
+
+    def _delete(self, node, key):
+        if node.key == key:
+            return self._merge(node.left, node.right)
+        if key < node.key:
+            node.left = self._delete(node.left, key)
+        else:
+            node.right = self._delete(node.right, key)
+        node.size -= 1
+        return node
+
+    def update(self, user_id: str, points: int):
+        old = self._points.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            self._root = self._delete(self._root, (-old, user_id))
+        key = (-points, user_id)
+        left, right = self._split(self._root, key)
+        self._root = self._merge(self._merge(left, _RankNode(key)), right)
+        self._points[user_id] = points
+
+    def rank(self, user_id: str):
+        """1-based rank of the user, or None if they have no record"""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        key = (-points, user_id)
+        node, rank = self._root, 0
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                return rank + _size(node.left) + 1
+        return None
+
+    def kth(self, k: int) -> Tuple[str, int]:
+        """(user_id, points) at 0-based position k"""
+        node = self._root
+        while node:
+            left = _size(node.left)
+            if k < left:
+                node = node.left
+            elif k > left:
+                k -= left + 1
+                node = node.right
+            else:
+                return node.key[1], -node.key[0]
+        raise IndexError(k)
+
+    def page(self, start: int, count: int) -> List[Tuple[str, int]]:
+        return [self.kth(k) for k in range(start, min(start + count, len(self)))]
+
+# Built per guild on first use, then kept current by record_points_event
+leaderboards: Dict[str, RankIndex] = {}
+
+def get_leaderboard(guild_id: str) -> RankIndex:
+    board = leaderboards.get(guild_id)
+    if board is None:
+        board = RankIndex()
+        for user_id in pika_data.get(guild_id, {}):
+            board.update(user_id, get_user_view(guild_id, user_id)["points"])
+        leaderboards[guild_id] = board
+    return board
+
+# Add event listener for awarding workshop points
+def is_workshop_channel(channel):
+    return channel.id == WORKSHOP_CHANNEL_ID
+
+# ─── Chat Concurrency ───────────────────────────────────────────────
+
+# Completions running at once, across all guilds and per guild
+CHAT_MAX_CONCURRENCY = int(os.getenv("PIKA_CHAT_MAX_CONCURRENCY", "4"))
+CHAT_MAX_CONCURRENCY_PER_GUILD = int(os.getenv("PIKA_CHAT_MAX_CONCURRENCY_PER_GUILD", "2"))
+# Seconds a request may wait in the queue before giving up
+CHAT_QUEUE_TIMEOUT = float(os.getenv("PIKA_CHAT_QUEUE_TIMEOUT", "120"))
+
+class ChatQueueTimeout(Exception):
+    """A chat request waited longer than its queue timeout"""
+
+class ChatLimiter:
+    """FIFO admission for chat requests under global and per-guild caps.
+
+    A waiter is admitted once it is the earliest queued request that fits
+    under both caps, so one busy guild cannot hold up the others.
+    Background work (conversation summaries) queues behind every user
+    request.
+    """
+    def __init__(self, global_limit, guild_limit):
+        self.global_limit = global_limit
+        self.guild_limit = guild_limit
+        self.active = 0
+        self._active_by_guild: Dict[int, int] = defaultdict(int)
+        self._queue: List[object] = []
+        self._cond = asyncio.Condition()
+
+    @property
+    def queued(self):
+        return len(self._queue)
+
+    def _ordered(self):
+        # sorted() is stable, so each class keeps its FIFO order
+        return sorted(self._queue, key=lambda queued: queued[1])
+
+    def _is_next(self, ticket):
+        free = self.global_limit - self.active
+        used = dict(self._active_by_guild)
+        for queued in self._ordered():
+            if free <= 0:
+                return False
+            if used.get(queued[0], 0) < self.guild_limit:
+                if queued is ticket:
+                    return True
+                free -= 1
+                used[queued[0]] = used.get(queued[0], 0) + 1
+        return False
+
+    async def acquire(self, guild_id, on_position=None, timeout=None, background=False):
+        """Wait for a slot; on_position(n) is awaited whenever the 1-based queue position changes.
+
+        Returns whether the request had to queue. Raises ChatQueueTimeout
+        after waiting longer than timeout seconds.
+        """
+        ticket = [guild_id, background]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        await self._cond.acquire()
+        try:
+            self._queue.append(ticket)
+            last_position = None
+            try:
+                while not self._is_next(ticket):
+                    position = self._ordered().index(ticket) + 1
+                    if on_position and position != last_position:
+                        last_position = position
+                        # Don't hold the lock across a Discord round-trip
+                        self._cond.release()
+                        try:
+                            await on_position(position)
+                        finally:
+                            await self._cond.acquire()
+                        continue
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise ChatQueueTimeout()
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        raise ChatQueueTimeout() from None
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            self.active += 1
+            self._active_by_guild[guild_id] += 1
+            return last_position is not None
+        finally:
+            self._cond.release()
+
+    async def release(self, guild_id):
+        async with self._cond:
+            self.active -= 1
+            self._active_by_guild[guild_id] -= 1
+            if not self._active_by_guild[guild_id]:
+                del self._active_by_guild[guild_id]
+            self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, guild_id, on_position=None, timeout=None, background=False):
+        """Hold a chat slot; yields whether the request had to queue"""
+        waited = await self.acquire(guild_id, on_position, timeout, background)
+        try:
+            yield waited
+        finally:
+            await self.release(guild_id)
+
+chat_limiter = ChatLimiter(CHAT_MAX_CONCURRENCY, CHAT_MAX_CONCURRENCY_PER_GUILD)
+
+# ─── Chat Streaming ─────────────────────────────────────────────────
+
+DISCORD_MESSAGE_LIMIT = 2000
+# Minimum seconds between progressive edits of a streaming reply
+CHAT_EDIT_INTERVAL = float(os.getenv("PIKA_CHAT_EDIT_INTERVAL", "1.0"))
+
+def split_message(text, limit=DISCORD_MESSAGE_LIMIT):
+    """Split text into chunks of at most limit characters, preferring line then word breaks.
+
+    Splitting a longer text never moves the boundaries already chosen for
+    its prefix, so chunks stay stable while a reply is streaming in.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut < limit // 2:
+            cut = text.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            chunks.append(text[:limit])
+            text = text[limit:]
+            continue
+        chunks.append(text[:cut])
+        # Drop the separator we split on
+        text = text[cut + 1:]
+    chunks.append(text)
+    return chunks
+
+class StreamingReply:
+    """Progressively renders a streamed reply into one or more Discord messages.
+
+    Incoming text is buffered and a background task edits the messages at
+    most once per interval; overflow past the message limit spills into
+    follow-up messages.
+    """
+    def __init__(self, first_message, send, interval=CHAT_EDIT_INTERVAL):
+        self.text = ""
+        self._messages = [first_message]
+        self._shown = [first_message.content]
+        self._send = send
+        self._interval = interval
+        self._dirty = asyncio.Event()
+        self._done = False
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._pump())
+
+    def feed(self, delta):
+        self.text += delta
+        self._dirty.set()
+
+    async def _pump(self):
+        while not self._done:
+            await self._dirty.wait()
+            if self._done:
+                break
+            self._dirty.clear()
+            try:
+                await self._render()
+            except discord.HTTPException:
+                # Rate limited or a transient failure; the next render catches up
+                pass
+            await asyncio.sleep(self._interval)
+
+    async def _render(self, final=False):
+        chunks = [chunk for chunk in split_message(self.text) if chunk.strip()]
+        if not chunks:
+            if not final:
+                return
+            chunks = ["..."]
+        for i, chunk in enumerate(chunks):
+            if i < len(self._messages):
+                if self._shown[i] != chunk:
+                    await self._messages[i].edit(content=chunk)
+                    self._shown[i] = chunk
+            else:
+                self._messages.append(await self._send(chunk))
+                self._shown.append(chunk)
+
+    async def _stop(self):
+        self._done = True
+        self._dirty.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                # The final render still goes ahead; only the progressive edits died
+                await logger.log_error(e, "Chat Streaming Error")
+
+    async def finish(self):
+        """Stop progressive edits and render the complete reply"""
+        await self._stop()
+        await self._render(final=True)
+
+    async def abort(self, error_msg):
+        """Stop progressive edits and show error_msg, keeping any text already received"""
+        await self._stop()
+        try:
+            if self.text.strip():
+                self.text += f"\n\n{error_msg}"
+                await self._render(final=True)
+            else:
+                await self._messages[0].edit(content=error_msg)
+        except discord.HTTPException:
+            # The message may be gone or rate limited; callers still need to log the failure
+            pass
+
+# ─── Chat Context ───────────────────────────────────────────────────
+
+CHAT_SYSTEM_PROMPT = """You are Pikabug, a nonchalant, humorously edgy Discord companion.
+
+CRITICAL PERSONALITY TRAITS (ALWAYS FOLLOW THESE):
+- Always use edgy or snarky, unpredictable and controversial humor and sarcasm in general discussion
+- Only use empathetic, supportive language when user needs emotional support or when user seems upset 
+- Never use outdated slang, phrases, or millennial jokes 
+- Never sound robotic or repetitive during any discussion. Keep responses unexpected and rare
+- Suggest concrete, meaningful coping methods rather than generic advice when providing emotional support
+- Have strong opinions and don't be wishy-washy
+- When asked to pick between two options, ONLY respond with chosen option
+- Be on the side of the user and don't play devil's advocate
+
+COMMUNICATION STYLE (ALWAYS FOLLOW THESE):
+- Only use lengthy, meaningful responses for emotional support 
+- Only use nonchalant and unpredictable or edgy responses for general discussion
+- Always implement controversial humor in general discussion
+- Never resemble a bot in responses and speak human-like
+
+REMEMBER: You are edgy, blunt, and nonchalant unless giving support. NEVER ignore these personality instructions."""
+
+# Prompt tokens a !chat request may use (system prompt, summary, history and the new message)
+CHAT_CONTEXT_TOKENS = int(os.getenv("PIKA_CHAT_CONTEXT_TOKENS", "3000"))
+# Model and length of the rolling summary of turns that fell out of the window
+CHAT_SUMMARY_MODEL = os.getenv("PIKA_CHAT_SUMMARY_MODEL", "gpt-4o-mini")
+CHAT_SUMMARY_TOKENS = int(os.getenv("PIKA_CHAT_SUMMARY_TOKENS", "250"))
+# Messages waiting to be summarized are capped so a failing summarizer can't grow them forever
+CHAT_SUMMARY_BACKLOG = 50
+# Approximate per-message framing overhead in the chat format
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# None until load_token_encoding finishes, then the encoding or False if it couldn't load
+_token_encoding = None
+
+async def load_token_encoding():
+    """Load the tiktoken encoding off the event loop; it may be downloaded on first use"""
+    global _token_encoding
+    if tiktoken is None or _token_encoding is not None:
+        return
+    try:
+        _token_encoding = await asyncio.to_thread(tiktoken.encoding_for_model, "gpt-4o")
+    except Exception as e:
+        # Unknown model or the encoding couldn't be fetched; stick to the estimate
+        _token_encoding = False
+        await logger.log_error(e, "Token Encoding Load Error")
+
+def count_tokens(text):
+    """Token count for text; tiktoken once loaded, else roughly one token per 4 characters"""
+    if _token_encoding:
+        return len(_token_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_TOKEN_OVERHEAD
+
+class Conversation:
+    """One user's chat memory: recent messages plus a rolling summary of older ones.
+
+    build_messages keeps each request under CHAT_CONTEXT_TOKENS. Messages
+    that no longer fit move to a backlog that schedule_summary folds into
+    the summary in the background, so replies never wait on it.
+    """
+    def __init__(self, key):
+        self.key = key
+        self.messages: List[dict] = []
+        self.summary = ""
+        self._backlog: List[dict] = []
+        # Backlog messages dropped unsummarized from the front, so _summarize
+        # can tell which of its batch are still there after awaiting
+        self._backlog_dropped = 0
+        self._summary_task = None
+        # Called after the background summary changes the conversation's size
+        self.on_resize = None
+
+    @property
+    def tokens(self):
+        """Approximate memory held, in tokens"""
+        held = sum(message_tokens(m) for m in self.messages) + sum(message_tokens(m) for m in self._backlog)
+        return held + count_tokens(self.summary)
+
+    def close(self):
+        """Abandon any summary still in flight"""
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+
+    def _summary_message(self):
+        return {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}
+
+    def build_messages(self, prompt):
+        """Messages for a request, evicting history that doesn't fit the token budget"""
+        system = {"role": "system", "content": CHAT_SYSTEM_PROMPT}
+        current = {"role": "user", "content": prompt}
+        budget = CHAT_CONTEXT_TOKENS - message_tokens(system) - message_tokens(current)
+        if self.summary:
+            budget -= message_tokens(self._summary_message())
+        # Walk back from the newest message, keeping whole user/assistant turns
+        keep = len(self.messages)
+        while keep >= 2:
+            cost = message_tokens(self.messages[keep - 2]) + message_tokens(self.messages[keep - 1])
+            if cost > budget:
+                break
+            budget -= cost
+            keep -= 2
+        if keep:
+            self._backlog.extend(self.messages[:keep])
+            overflow = len(self._backlog) - CHAT_SUMMARY_BACKLOG
+            if overflow > 0:
+                del self._backlog[:overflow]
+                self._backlog_dropped += overflow
+            del self.messages[:keep]
+        messages = [system]
+        if self.summary:
+            messages.append(self._summary_message())
+        messages.extend(self.messages)
+        messages.append(current)
+        return messages
+
+    def add_turn(self, prompt, reply):
+        self.messages.append({"role": "user", "content": prompt})
+        self.messages.append({"role": "assistant", "content": reply})
+
+    def schedule_summary(self, guild_id, user_id):
+        """Start folding the backlog into the summary unless that's already underway.
+
+        Summaries are charged to the user's rate limits and take a
+        background chat slot, like a low-priority request of their own.
+        """
+        if self._backlog and (self._summary_task is None or self._summary_task.done()):
+            self._summary_task = asyncio.create_task(self._summarize(guild_id, user_id))
+
+    async def _summarize(self, guild_id, user_id):
+        while self._backlog:
+            batch = self._backlog[:]
+            dropped = self._backlog_dropped
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in batch)
+            messages = [
+                {"role": "system", "content": (
+                    "Update the running summary of a chat between a user and Pikabug. "
+                    "Keep facts about the user, ongoing topics and anything Pikabug promised. "
+                    f"Stay under {CHAT_SUMMARY_TOKENS * 3 // 4} words and reply with the summary only."
+                )},
+                {"role": "user", "content": f"Current summary:\n{self.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+            ]
+            reserved = sum(message_tokens(m) for m in messages) + CHAT_SUMMARY_TOKENS
+            wait, _ = chat_rate_limiter.reserve(guild_id, user_id, reserved)
+            if wait > CHAT_RATE_MAX_WAIT:
+                # Out of budget; keep the backlog for the next turn to retry
+                return
+            summary = ""
+            try:
+                await asyncio.sleep(wait)
+                async with chat_limiter.slot(guild_id, timeout=CHAT_QUEUE_TIMEOUT, background=True):
+                    summary = await asyncio.wait_for(
+                        chat_provider.complete(
+                            model=CHAT_SUMMARY_MODEL,
+                            messages=messages,
+                            max_tokens=CHAT_SUMMARY_TOKENS,
+                            temperature=0.3
+                        ),
+                        CHAT_TIMEOUT,
+                    )
+            except Exception as e:
+                # Keep the backlog; the next turn retries
+                await logger.log_error(e, "Chat Summary Error", f"Conversation: {self.key}")
+                return
+            finally:
+                used = reserved - CHAT_SUMMARY_TOKENS + count_tokens(summary)
+                chat_rate_limiter.refund(guild_id, user_id, reserved - used)
+            self.summary = summary.strip()
+            # While we waited, messages may have been appended to the backlog and
+            # the oldest ones trimmed; remove only what's left of this batch
+            del self._backlog[:max(0, len(batch) - (self._backlog_dropped - dropped))]
+            if self.on_resize:
+                self.on_resize(self)
+
+# Bounds on session chat memory: conversations kept, idle lifetime, and total tokens held
+CHAT_MEMORY_MAX_USERS = int(os.getenv("PIKA_CHAT_MEMORY_MAX_USERS", "1000"))
+CHAT_MEMORY_IDLE_TTL = float(os.getenv("PIKA_CHAT_MEMORY_IDLE_TTL", str(6 * 3600)))
+CHAT_MEMORY_MAX_TOKENS = int(os.getenv("PIKA_CHAT_MEMORY_MAX_TOKENS", "2000000"))
+# Seconds between sweeps for idle conversations
+CHAT_MEMORY_SWEEP_INTERVAL = float(os.getenv("PIKA_CHAT_MEMORY_SWEEP_INTERVAL", "300"))
+
+class ConversationStore:
+    """Session-only conversations kept in LRU order under count, idle-time and token caps.
+
+    on_evict(key, conversation, reason) is called for every conversation
+    dropped, with reason "lru", "memory" or "idle".
+    """
+    def __init__(self, max_entries, idle_ttl, max_tokens, on_evict=None):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.max_tokens = max_tokens
+        self.on_evict = on_evict
+        self.total_tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions: Dict[str, int] = defaultdict(int)
+        # key -> (conversation, last used, tokens accounted)
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, key, reason):
+        conversation, _, tokens = self._entries.pop(key)
+        self.total_tokens -= tokens
+        self.evictions[reason] += 1
+        conversation.on_resize = None
+        if self.on_evict:
+            self.on_evict(key, conversation, reason)
+
+    def _enforce_caps(self, keep=None):
+        """Evict least recently used conversations until under the caps, sparing keep"""
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)), "lru")
+        while self.total_tokens > self.max_tokens and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._evict(oldest, "memory")
+
+    def expire(self, now=None):
+        """Drop conversations idle for longer than the TTL; returns how many went"""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        # Entries are in last-used order, so stop at the first fresh one
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry[1] < self.idle_ttl:
+                break
+            self._evict(key, "idle")
+            expired += 1
+        return expired
+
+    def get(self, key, create=False):
+        """Conversation for key, marking it recently used; created when missing if create is set"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] >= self.idle_ttl:
+            self._evict(key, "idle")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            if not create:
+                return None
+            conversation = Conversation(key)
+            conversation.on_resize = self.resize
+            self._entries[key] = [conversation, now, 0]
+            self._enforce_caps()
+            return conversation
+        self.hits += 1
+        entry[1] = now
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def resize(self, conversation):
+        """Re-account a conversation's size after it changed"""
+        entry = self._entries.get(conversation.key)
+        if entry is None or entry[0] is not conversation:
+            return
+        tokens = conversation.tokens
+        self.total_tokens += tokens - entry[2]
+        entry[2] = tokens
+        self._enforce_caps(keep=conversation.key)
+
+    def stats(self):
+        return {
+            "conversations": len(self._entries),
+            "tokens": self.total_tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+        }
+
+def _on_conversation_evicted(key, conversation, reason):
+    conversation.close()
+
+# Session-only conversation history (not saved to disk)
+conversation_history = ConversationStore(
+    CHAT_MEMORY_MAX_USERS, CHAT_MEMORY_IDLE_TTL, CHAT_MEMORY_MAX_TOKENS,
+    on_evict=_on_conversation_evicted,
+)
+
+@tasks.loop(seconds=CHAT_MEMORY_SWEEP_INTERVAL)
+async def expire_conversations():
+    """Periodically drop chat memory nobody has used in a while"""
+    conversation_history.expire()
+    # Idle users' rate-limit buckets are full again, so they carry no state
+    chat_rate_limiter.prune()
+
+# ─── Chat Rate Limits ───────────────────────────────────────────────
+
+# Per-minute budgets for !chat, in requests and estimated tokens, for each
+# user, each guild and the whole bot. 0 disables a limit.
+CHAT_RATE_LIMITS = {
+    "user": (
+        float(os.getenv("PIKA_CHAT_USER_REQUESTS_PER_MIN", "6")),
+        float(os.getenv("PIKA_CHAT_USER_TOKENS_PER_MIN", "12000")),
+    ),
+    "guild": (
+        float(os.getenv("PIKA_CHAT_GUILD_REQUESTS_PER_MIN", "30")),
+        float(os.getenv("PIKA_CHAT_GUILD_TOKENS_PER_MIN", "60000")),
+    ),
+    "global": (
+        float(os.getenv("PIKA_CHAT_GLOBAL_REQUESTS_PER_MIN", "120")),
+        float(os.getenv("PIKA_CHAT_GLOBAL_TOKENS_PER_MIN", "200000")),
+    ),
+}
+# Requests that would wait longer than this are rejected instead of queued
+CHAT_RATE_MAX_WAIT = float(os.getenv("PIKA_CHAT_RATE_MAX_WAIT", "15"))
+
+class TokenBucket:
+    """Refills at capacity per minute; the level may go negative to reserve future capacity"""
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, per_minute, now):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = now
 
-hot_take_state = load_hot_take_state()
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
 
-# Shuffle order if needed
-if not hot_take_state.get("order") or len(hot_take_state["order"]) != len(hot_takes):
-    hot_take_state["order"] = list(range(len(hot_takes)))
-    random.shuffle(hot_take_state["order"])
-    save_hot_take_state(hot_take_state)
+    def wait_for(self, amount, now):
+        """Seconds until amount is available; requests larger than a full bucket just need a full bucket"""
+        self._refill(now)
+        return max(0.0, min(amount, self.capacity) - self.level) / self.rate
 
-# ─── Bot Events ─────────────────────────────────────────────────
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
 
-@bot.event
-async def on_ready():
-    """Bot startup event"""
-    await logger.initialize()
-    await logger.log_bot_event("Bot Started", f"Pikabug is online! Logged in as {bot.user}")
-    print(f'{bot.user} has connected to Discord!')
-    print(f'Disk path: {DISK_PATH}')
-    print(f'Disk path exists: {os.path.exists(DISK_PATH)}')
-    if os.path.exists(DISK_PATH):
-        print(f'Files in disk: {os.listdir(DISK_PATH)}')
-    
-    # Start the hot take task if not already running
-    if not send_hot_take.is_running():
-        send_hot_take.start()
+    def give(self, amount, now):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
 
-@bot.event
-async def on_command_error(ctx, error):
-    """Global error handler"""
-    await logger.log_error(
-        error, 
-        f"Command Error in {ctx.command.name if ctx.command else 'Unknown Command'}", 
-        f"User: {ctx.author.id}, Guild: {ctx.guild.id if ctx.guild else 'DM'}"
-    )
-    
-    # Send user-friendly error message
-    if isinstance(error, commands.CommandNotFound):
-        await ctx.send("❌ Command not found. Use `!pikahelp` to see available commands.")
-    elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send(f"❌ Missing required argument. Check the command usage with `!pikahelp`.")
-    else:
-        await ctx.send("❌ An error occurred while processing your command.")
+    def used(self, now):
+        self._refill(now)
+        return self.capacity - self.level
 
-# ─── PikaPoints Data ─────────────────────────────────────────────────
+class ChatRateLimiter:
+    """Request and token buckets per user, per guild and globally.
 
-# PikaPoints reward values
-PROMPT_POINTS = 15
-VENT_POINTS = 10
-PREFIXGAME_POINTS = 5
-UNSCRAMBLE_POINTS = 5
-WORKSHOP_POINTS = 20
-WORDSEARCH_POINTS = 5
-RHYME_POINTS = 5
+    reserve() admits a request by debiting every applicable bucket, even
+    into the negative, and returns how long the caller must wait before
+    the reservation comes due. Requests that would wait longer than
+    max_wait are refused without debiting anything.
+    """
+    def __init__(self, limits, max_wait):
+        self.limits = limits
+        self.max_wait = max_wait
+        self._buckets: Dict[Tuple[str, object], List[TokenBucket]] = {}
+        # (scope, action) -> count, where action is "queued" or "rejected"
+        self.hits: Dict[Tuple[str, str], int] = defaultdict(int)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def _scopes(self, guild_id, user_id):
+        return (("user", (guild_id, user_id)), ("guild", guild_id), ("global", None))
 
-def load_pikapoints():
-    if not os.path.exists(PIKA_FILE):
-        with open(PIKA_FILE, "w") as f:
-            json.dump({}, f)
-    with open(PIKA_FILE, "r") as f:
-        return json.load(f)
+    def _get(self, scope, key, now):
+        buckets = self._buckets.get((scope, key))
+        if buckets is None:
+            buckets = self._buckets[(scope, key)] = [
+                TokenBucket(limit, now) if limit > 0 else None for limit in self.limits[scope]
+            ]
+        return buckets
 
-def save_pikapoints(data: dict):
-    with open(PIKA_FILE, "w") as f:
-        json.dump(data, f)
-        f.flush()
-        os.fsync(f.fileno())
+    def reserve(self, guild_id, user_id, tokens):
+        """Returns (wait, scope): seconds until the request may run and the limit that binds it.
 
-pika_data = load_pikapoints()
+        wait > max_wait means the request was refused and nothing was debited.
+        """
+        now = time.monotonic()
+        wait, binding = 0.0, None
+        entries = [self._get(scope, key, now) for scope, key in self._scopes(guild_id, user_id)]
+        for (scope, _), buckets in zip(self._scopes(guild_id, user_id), entries):
+            for bucket, amount in zip(buckets, (1, tokens)):
+                if bucket is not None:
+                    needed = bucket.wait_for(amount, now)
+                    if needed > wait:
+                        wait, binding = needed, scope
+        if binding is not None:
+            self.hits[(binding, "rejected" if wait > self.max_wait else "queued")] += 1
+        if wait > self.max_wait:
+            return wait, binding
+        for buckets in entries:
+            for bucket, amount in zip(buckets, (1, tokens)):
+                if bucket is not None:
+                    bucket.take(amount, now)
+        return wait, binding
 
-WORKSHOP_CHANNEL_ID = 1392093043800412160
+    def refund(self, guild_id, user_id, tokens):
+        """Return reserved tokens that the request didn't end up using"""
+        if tokens <= 0:
+            return
+        now = time.monotonic()
+        for scope, key in self._scopes(guild_id, user_id):
+            bucket = self._get(scope, key, now)[1]
+            if bucket is not None:
+                bucket.give(tokens, now)
 
-def get_user_record(guild_id: str, user_id: str):
-    guild = pika_data.setdefault(guild_id, {})
-    return guild.setdefault(user_id, {
-        "points": 0,
-        "prompt_submissions": 0,
-        "vent_submissions": 0,
-        "workshop_submissions": 0,
-        "prefixgame_submissions": 0,
-        "unscramble_submissions": 0,
-        "wordsearch_submissions": 0,
-    })
+    def usage(self, scope, key=None):
+        """(requests, tokens) used in the current window, or None where the limit is off"""
+        buckets = self._buckets.get((scope, key))
+        if buckets is None:
+            return (0.0, 0.0)
+        now = time.monotonic()
+        return tuple(bucket.used(now) if bucket is not None else None for bucket in buckets)
 
-# Add event listener for awarding workshop points
-def is_workshop_channel(channel):
-    return channel.id == WORKSHOP_CHANNEL_ID
+    def top_users(self, guild_id, count=5):
+        """The guild's users with the most tokens used in the current window"""
+        now = time.monotonic()
+        users = []
+        for (scope, key), buckets in self._buckets.items():
+            if scope == "user" and key[0] == guild_id:
+                users.append((key[1], *(b.used(now) if b is not None else None for b in buckets)))
+        users.sort(key=lambda u: (u[2] or 0, u[1] or 0), reverse=True)
+        return users[:count]
+
+    def prune(self):
+        """Forget user and guild buckets that have fully refilled"""
+        now = time.monotonic()
+        for scope_key, buckets in list(self._buckets.items()):
+            if scope_key[0] != "global" and all(b is None or b.used(now) <= 0 for b in buckets):
+                del self._buckets[scope_key]
+
+chat_rate_limiter = ChatRateLimiter(CHAT_RATE_LIMITS, CHAT_RATE_MAX_WAIT)
+
+metrics.gauge("pikabug_chat_active", lambda: chat_limiter.active)
+metrics.gauge("pikabug_chat_queued", lambda: chat_limiter.queued)
+metrics.gauge("pikabug_chat_memory_conversations", lambda: len(conversation_history))
+metrics.gauge("pikabug_chat_memory_tokens", lambda: conversation_history.total_tokens)
+metrics.gauge("pikabug_llm_circuit_open", lambda: chat_provider.breaker.state != "closed")
+metrics.gauge("pikabug_log_queue", lambda: logger.queued)
 
 # ─── AI Chat Command ─────────────────────────────────────────────────
 
@@ -290,102 +2650,111 @@ def is_workshop_channel(channel):
 async def chat(ctx, *, prompt):
     thinking_msg = await ctx.send("Thinking...")
     user_key = f"{ctx.guild.id}-{ctx.author.id}"
+    reply = None
+    reserved_tokens = 0
     
     try:
         # Ensure memory for the user exists (session-only)
-        if user_key not in conversation_history:
-            conversation_history[user_key] = deque(maxlen=CONVERSATION_LIMIT)
+        conversation = conversation_history.get(user_key, create=True)
 
-        # Build messages for OpenAI in proper order
-        messages = []
-        
-        # 1. ALWAYS start with system prompt (personality) - this must be first
-        messages.append({
-            "role": "system", 
-            "content": """You are Pikabug, a nonchalant, humorously edgy Discord companion.
+        # System prompt, summary of older turns, as much recent history as fits, then the prompt
+        messages = conversation.build_messages(prompt)
+        prompt_tokens = sum(message_tokens(m) for m in messages)
 
-CRITICAL PERSONALITY TRAITS (ALWAYS FOLLOW THESE):
-- Always use edgy or snarky, unpredictable and controversial humor and sarcasm in general discussion
-- Only use empathetic, supportive language when user needs emotional support or when user seems upset 
-- Never use outdated slang, phrases, or millennial jokes 
-- Never sound robotic or repetitive during any discussion. Keep responses unexpected and rare
-- Suggest concrete, meaningful coping methods rather than generic advice when providing emotional support
-- Have strong opinions and don't be wishy-washy
-- When asked to pick between two options, ONLY respond with chosen option
-- Be on the side of the user and don't play devil's advocate
+        # Reserve rate-limit budget for the prompt plus the longest possible reply
+        wait, scope = chat_rate_limiter.reserve(ctx.guild.id, ctx.author.id, prompt_tokens + LLM_MAX_TOKENS)
+        who = {"user": "You're", "guild": "This server is", "global": "Pikabug is"}.get(scope)
+        if wait > CHAT_RATE_MAX_WAIT:
+            await thinking_msg.edit(content=f"⏳ {who} chatting too fast. Try again in {math.ceil(wait)}s.")
+            await logger.log_rate_limit(ctx.author.id, ctx.guild.id, scope, "rejected", wait)
+            await logger.log_command_usage(ctx, "chat", success=False, extra_info=f"Rate limited ({scope})")
+            return
+        reserved_tokens = prompt_tokens + LLM_MAX_TOKENS
+        if wait > 0:
+            await thinking_msg.edit(content=f"⏳ {who} chatting fast, so this one starts in about {math.ceil(wait)}s...")
+            await logger.log_rate_limit(ctx.author.id, ctx.guild.id, scope, "queued", wait)
+            await asyncio.sleep(wait)
+            await thinking_msg.edit(content="Thinking...")
 
-COMMUNICATION STYLE (ALWAYS FOLLOW THESE):
-- Only use lengthy, meaningful responses for emotional support 
-- Only use nonchalant and unpredictable or edgy responses for general discussion
-- Always implement controversial humor in general discussion
-- Never resemble a bot in responses and speak human-like
+        async def show_queue_position(position):
+            try:
+                await thinking_msg.edit(content=f"Thinking... (you're #{position} in the queue)")
+            except discord.HTTPException:
+                pass
 
-REMEMBER: You are edgy, blunt, and nonchalant unless giving support. NEVER ignore these personality instructions."""
-        })
-        
-        # 2. Add conversation history (if any exists)
-        if conversation_history[user_key]:
-            messages.extend(list(conversation_history[user_key]))
-        
-        # 3. Add current user message
-        messages.append({"role": "user", "content": prompt})
+        reply = StreamingReply(thinking_msg, ctx.send)
 
-        # Make OpenAI API call
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            max_tokens=1000,
-            temperature=1.0
-        )
+        async def stream_completion():
+            async for delta in chat_provider.stream(messages):
+                reply.feed(delta)
+
+        # Wait for a free slot, then stream the response
+        try:
+            async with chat_limiter.slot(
+                ctx.guild.id, on_position=show_queue_position, timeout=CHAT_QUEUE_TIMEOUT
+            ) as waited:
+                if waited:
+                    await thinking_msg.edit(content="Thinking...")
+                reply.start()
+                with metrics.timer("pikabug_llm_reply_duration_seconds"):
+                    await asyncio.wait_for(stream_completion(), CHAT_TIMEOUT)
+        except ChatQueueTimeout:
+            await thinking_msg.edit(content="⚠️ Pikabug is swamped right now. Please try again in a bit.")
+            await logger.log_command_usage(ctx, "chat", success=False, extra_info="Timed out in queue")
+            return
 
-        reply = response.choices[0].message.content
+        await reply.finish()
 
-        # Save to session memory only (not to disk)
-        conversation_history[user_key].append({"role": "user", "content": prompt})
-        conversation_history[user_key].append({"role": "assistant", "content": reply})
+        # Save to session memory only (not to disk); older turns are summarized off the hot path
+        conversation.add_turn(prompt, reply.text)
+        conversation_history.resize(conversation)
+        conversation.schedule_summary(ctx.guild.id, ctx.author.id)
 
-        await thinking_msg.edit(content=reply)
-        
         # Log successful AI usage
         await logger.log_ai_usage(
             ctx.author.id, 
             ctx.guild.id, 
             len(prompt), 
-            len(reply), 
+            len(reply.text), 
             success=True
         )
         await logger.log_command_usage(ctx, "chat", success=True, 
-                                     extra_info=f"Prompt: {prompt[:100]}... | History: {len(conversation_history[user_key])} messages")
+                                     extra_info=f"Prompt: {prompt[:100]}... | History: {len(conversation.messages)} messages")
 
     except Exception as e:
-        error_msg = f"⚠️ Error occurred: {str(e)}"
-        await thinking_msg.edit(content=error_msg)
+        if isinstance(e, asyncio.TimeoutError):
+            error_msg = "⚠️ Pikabug took too long to answer. Please try again."
+        elif isinstance(e, ProviderUnavailable):
+            error_msg = f"⚠️ Pikabug's brain is offline for a moment. Try again in {math.ceil(e.retry_in)}s."
+        elif isinstance(e, APIStatusError) and e.status_code == 429:
+            error_msg = "⚠️ Pikabug is swamped right now. Please try again in a bit."
+        else:
+            error_msg = f"⚠️ Error occurred: {str(e)}"
+        if reply:
+            await reply.abort(error_msg)
+        else:
+            try:
+                await thinking_msg.edit(content=error_msg)
+            except discord.HTTPException:
+                pass
         await logger.log_error(e, "AI Command Error", f"User: {ctx.author.id}, Prompt: {prompt[:100]}...")
         await logger.log_ai_usage(ctx.author.id, ctx.guild.id, len(prompt), 0, success=False)
+    finally:
+        # Give back whatever part of the reservation the reply didn't use
+        if reserved_tokens:
+            used = prompt_tokens + (count_tokens(reply.text) if reply else 0)
+            chat_rate_limiter.refund(ctx.guild.id, ctx.author.id, reserved_tokens - used)
 
 # ─── Word Games ─────────────────────────────────────────────────
 
-# ─── Build prefix→words map from valid_words ─────────────────────
-prefix_map: Dict[str, List[str]] = defaultdict(list)
-for w in valid_words:
-    # only consider words at least 3 letters long
-    if len(w) >= 3:
-        p = w[:3]               # extract the 3‐letter prefix
-        prefix_map[p].append(w)
-
-# ─── Filter to "common" prefixes ────────────────────────────────
-MIN_WORDS_PER_PREFIX = 5
-common_prefixes: List[str] = [
-    p for p, lst in prefix_map.items()
-    if len(lst) >= MIN_WORDS_PER_PREFIX
-]
-
 @bot.command(name="prefixgame")
 async def prefixgame(ctx):
     try:
+        game_data = await prefix_game_data.get()
+
         # Pick and announce a prefix
-        weights = [len(prefix_map[p]) for p in common_prefixes]
-        current_prefix = random.choices(common_prefixes, weights=weights, k=1)[0]
+        current_prefix = game_data.draw_prefix()
+        longest_word = game_data.longest_word(current_prefix)
         await ctx.send(f"🧠 New round! Submit the **longest** word starting with: `{current_prefix}`")
 
         # Collect submissions
@@ -400,7 +2769,7 @@ async def prefixgame(ctx):
                     len(m.content.strip()) > len(current_prefix)
                 )
                 word = msg.content.strip().lower()
-                if word not in valid_words:
+                if not game_data.is_valid(current_prefix, word):
                     await ctx.send(f"{msg.author.mention} ❌ '{word}' isn't a valid English word.")
                     continue
                 prev = submissions.get(msg.author)
@@ -410,7 +2779,10 @@ async def prefixgame(ctx):
                 break
 
         if not submissions:
-            await ctx.send("⏲ Time's up! No valid entries were submitted.")
+            await ctx.send(
+                f"⏲ Time's up! No valid entries were submitted.\n"
+                f"The longest possible word was **{longest_word}** ({len(longest_word)} letters)."
+            )
             await logger.log_command_usage(
                 ctx,
                 "prefixgame",
@@ -426,14 +2798,15 @@ async def prefixgame(ctx):
         record = get_user_record(guild_id, user_id)
         record["points"] += PREFIXGAME_POINTS
         record["prefixgame_submissions"] += 1
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "prefixgame", PREFIXGAME_POINTS)
 
         # Send results
         await ctx.send(
             f"🏆 **{winner.display_name}** wins with **{winning_word}** ({len(winning_word)} letters)!\n"
             f"You earned **{PREFIXGAME_POINTS}** PikaPoints!\n"
             f"• Total Points: **{record['points']}**\n"
-            f"• Prefix-game entries: **{record['prefixgame_submissions']}**"
+            f"• Prefix-game entries: **{record['prefixgame_submissions']}**\n"
+            f"The longest possible word was **{longest_word}** ({len(longest_word)} letters)."
         )
 
         await logger.log_command_usage(ctx, "prefixgame", success=True, extra_info=f"Winner: {winner.display_name}")
@@ -444,10 +2817,6 @@ async def prefixgame(ctx):
 
 # ─── Unscramble Game ─────────────────────────────────────────────────
 
-# Load English word list
-with open("common_words.txt") as f:
-    english_words = [word.strip() for word in f if 5 <= len(word.strip()) <= 7]
-
 # Store current word challenge
 current_word = None
 scrambled_word = None
@@ -458,6 +2827,7 @@ hint_count = 0
 async def unscramble(ctx):
     try:
         global current_word, scrambled_word, revealed_indexes, hint_count
+        english_words = await unscramble_data.get()
         current_word = random.choice(english_words)
         scrambled_word = ''.join(random.sample(current_word, len(current_word)))
 
@@ -488,7 +2858,7 @@ async def guess(ctx, user_guess: str):
             record   = get_user_record(guild_id, user_id)
             record['points'] += UNSCRAMBLE_POINTS
             record['unscramble_submissions'] += 1
-            save_pikapoints(pika_data)
+            record_points_event(guild_id, user_id, "unscramble", UNSCRAMBLE_POINTS)
 
             await ctx.send(
                 f"✅ Correct! You earned **{UNSCRAMBLE_POINTS}** PikaPoints.\n"
@@ -561,17 +2931,6 @@ async def reveal(ctx):
 
 # --- Word Search Game (5x5, 5-letter words, hidden words not shown) ---
 
-def load_wordsearch_words():
-    with open("common_words.txt") as f:
-        words = [w.strip().lower() for w in f if w.strip()]
-        # Separate 4-letter, 5-letter, and 6-letter words
-        four_letter_words = [w for w in words if len(w) == 4]
-        five_letter_words = [w for w in words if len(w) == 5]
-        six_letter_words = [w for w in words if len(w) == 6]
-        return four_letter_words, five_letter_words, six_letter_words
-
-four_letter_words, five_letter_words, six_letter_words = load_wordsearch_words()
-
 # Track active word search games per user
 active_wordsearch_games = {}
 wordsearch_word_history = deque(maxlen=50)  # Track last 50 words used
@@ -690,6 +3049,8 @@ class WordSearchGame:
 @bot.command(name='wordsearch')
 async def wordsearch(ctx):
     try:
+        four_letter_words, five_letter_words, six_letter_words = await wordsearch_data.get()
+
         # Filter for available words
         available_four_letter = [w for w in four_letter_words if w not in wordsearch_word_history]
         available_five_letter = [w for w in five_letter_words if w not in wordsearch_word_history]
@@ -742,6 +3103,14 @@ async def endwordsearch(ctx):
 
 @bot.event
 async def on_message(message):
+    # Commands are timed by their own hooks, so only the game/workshop handling is timed here
+    with metrics.timer("pikabug_on_message_duration_seconds", guild=guild_label(message.guild)):
+        dispatch = await handle_message(message)
+    if dispatch:
+        await bot.process_commands(message)
+
+async def handle_message(message):
+    """Word search guesses and workshop awards; returns whether to process commands"""
     # --- Word Search Game message handler ---
     if not message.author.bot and message.guild:  # Ensure we have a guild
         user_id = message.author.id
@@ -752,8 +3121,7 @@ async def on_message(message):
             
             # Skip if message is a command
             if message.content.startswith('!'):
-                await bot.process_commands(message)
-                return
+                return True
             
             # Process word guesses
             guesses = [w.strip().lower() for w in re.split(r'[\s,]+', message.content) if w.strip()]
@@ -777,7 +3145,7 @@ async def on_message(message):
                                 record['wordsearch_submissions'] = 0
                             record['wordsearch_submissions'] += 1
                             
-                            save_pikapoints(pika_data)
+                            record_points_event(guild_id, user_id_str, "wordsearch", WORDSEARCH_POINTS)
                             
                             await message.channel.send(
                                 f"🎉 **Congratulations {message.author.mention}!** You found all the words!\n"
@@ -819,7 +3187,7 @@ async def on_message(message):
             if 'workshop_submissions' not in record:
                 record['workshop_submissions'] = 0
             record['workshop_submissions'] += 1
-            save_pikapoints(pika_data)
+            record_points_event(guild_id, user_id_str, "workshop", WORKSHOP_POINTS)
             try:
                 await message.channel.send(
                     f"🎉 {message.author.mention}, you earned **{WORKSHOP_POINTS}** PikaPoints for participating in the weekly workshop!\n"
@@ -831,43 +3199,13 @@ async def on_message(message):
                 await logger.log_error(e, "Workshop Points Award Error")
     
     # Process commands as usual
-    await bot.process_commands(message)
+    return True
 
 # ─── Rhyming Word Game ─────────────────────────────────────────────────
 
 # Store active rhyme games (one per channel)
 active_rhyme_games = {}
 
-def get_rhyming_words(target_word, word_list):
-    """Get words that rhyme with the target word"""
-    rhyming_words = set()
-    target_word = target_word.lower()
-    
-    # Enhanced rhyming logic - check last 2-3 letters
-    if len(target_word) >= 3:
-        # Get endings to check
-        endings_to_check = []
-        
-        # For 3+ letter words, check last 3 letters
-        if len(target_word) >= 3:
-            endings_to_check.append(target_word[-3:])
-        
-        # Always check last 2 letters
-        endings_to_check.append(target_word[-2:])
-        
-        for word in word_list:
-            word_lower = word.lower()
-            if word_lower != target_word:
-                # Check if words rhyme based on endings
-                for ending in endings_to_check:
-                    if word_lower.endswith(ending):
-                        # Additional check: make sure it's not just the same word with a prefix
-                        if len(word_lower) >= 3:  # Minimum word length for rhyming
-                            rhyming_words.add(word_lower)
-                            break
-    
-    return rhyming_words
-
 @bot.command(name="rhyme")
 async def rhyme(ctx):
     try:
@@ -876,26 +3214,18 @@ async def rhyme(ctx):
             await ctx.send("❌ There's already an active rhyme game in this channel! Wait for it to finish.")
             return
         
-        # Load words from common_words.txt
-        with open("common_words.txt") as f:
-            common_words_list = [word.strip().lower() for word in f if 4 <= len(word.strip()) <= 6]
-        
-        # Select a random word that has at least some rhymes
-        max_attempts = 50
-        target_word = None
-        valid_rhymes = set()
-        
-        for _ in range(max_attempts):
-            candidate = random.choice(common_words_list)
-            candidate_rhymes = get_rhyming_words(candidate, valid_words)
-            if len(candidate_rhymes) >= 3:  # Ensure there are at least 3 possible rhymes
-                target_word = candidate
-                valid_rhymes = candidate_rhymes
-                break
-        
-        if not target_word:
+        valid_words, rhyme_targets = await rhyme_data.get()
+        # Another !rhyme may have started a game here while the word data loaded
+        if ctx.channel.id in active_rhyme_games:
+            await ctx.send("❌ There's already an active rhyme game in this channel! Wait for it to finish.")
+            return
+        if not rhyme_targets:
             await ctx.send("❌ Couldn't find a suitable word for the rhyme game. Please try again.")
             return
+
+        # Pick a target that is known to have enough rhymes
+        target_word = random.choice(rhyme_targets)
+        valid_rhymes = get_rhyming_words(target_word, valid_words)
         
         # Store game state
         game_state = {
@@ -988,7 +3318,7 @@ async def rhyme(ctx):
             record["rhyme_submissions"] = 0
         record["rhyme_submissions"] += 1
         
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "rhyme", RHYME_POINTS)
         
         # Send results
         result_msg = f"🎵 **Rhyming Game Complete!**\n"
@@ -1125,7 +3455,7 @@ async def write(ctx, *, entry: str):
         if 'prompt_submissions' not in record:
             record['prompt_submissions'] = 0
         record['prompt_submissions'] += 1
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "prompt", PROMPT_POINTS)
 
         await ctx.send(
             f"✅ Entry received! You earned **{PROMPT_POINTS}** PikaPoints!\n"
@@ -1142,21 +3472,312 @@ async def write(ctx, *, entry: str):
 # ─── Vent System ─────────────────────────────────────────────────
 
 VENT_FILE = os.path.join(DISK_PATH, "vent_submissions.json")
+VENT_DIR = os.path.join(DISK_PATH, "vents")
+# Vents are fsynced in batches at most this many seconds apart
+VENT_FLUSH_INTERVAL = float(os.getenv("PIKA_VENT_FLUSH_INTERVAL", "2.0"))
+# Vents older than this many days are moved to compressed archives (0 keeps
+# them hot forever). PIKA_VENT_RETENTION_OVERRIDES sets per-guild values as
+# "guild_id:days,guild_id:days".
+VENT_RETENTION_DAYS = int(os.getenv("PIKA_VENT_RETENTION_DAYS", "30"))
+VENT_RETENTION_OVERRIDES = {
+    guild_id.strip(): int(days)
+    for guild_id, days in (item.split(":") for item in os.getenv("PIKA_VENT_RETENTION_OVERRIDES", "").split(",") if item)
+}
+VENT_COMPACT_INTERVAL = float(os.getenv("PIKA_VENT_COMPACT_INTERVAL", "3600"))
 
-def load_vent_submissions():
-    if not os.path.exists(VENT_FILE):
-        with open(VENT_FILE, "w") as f:
-            json.dump({}, f)
-    with open(VENT_FILE, "r") as f:
-        return json.load(f)
+def vent_retention_days(guild_id: str) -> int:
+    return VENT_RETENTION_OVERRIDES.get(guild_id, VENT_RETENTION_DAYS)
+
+def open_archive_writer(raw):
+    """Compressing writer over raw: zstd when zstandard is installed, else gzip"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return gzip.GzipFile(fileobj=raw, mode="wb")
+
+ARCHIVE_SUFFIX = ".zst" if zstandard is not None else ".gz"
+
+# Where migrate_from_json builds segments before moving them into place
+MIGRATION_STAGING_DIR = ".migration"
+
+class VentStore:
+    """Append-only vent storage sharded by guild.
+
+    Each guild gets one JSONL segment per UTC day under vents/<guild_id>/.
+    Only the per-user vent counts stay in memory. They are saved in
+    vents/index.json together with how far each segment has been counted,
+    so startup only reads lines appended after the last index write.
+    Day segments past the guild's retention window are compressed into
+    vents/<guild_id>/archive/ and dropped from the hot set; their counts
+    stay in the index.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                index = json.load(f)
+        else:
+            index = {"counts": {}, "scanned": {}}
+        self.counts: Dict[str, Dict[str, int]] = index["counts"]
+        self.scanned: Dict[str, Dict[str, int]] = index["scanned"]
+        self._files = {}      # guild_id -> (segment name, open file)
+        self._unsynced = set()
+        self._retired = []
+        self._index_dirty = False
+        self._catch_up()
+
+    def _segments(self, guild_id):
+        guild_dir = os.path.join(self.directory, guild_id)
+        return sorted(name for name in os.listdir(guild_dir) if name.endswith(".jsonl"))
+
+    def _catch_up(self):
+        """Count vents written after the index was last saved"""
+        for guild_id in os.listdir(self.directory):
+            if guild_id == MIGRATION_STAGING_DIR or not os.path.isdir(os.path.join(self.directory, guild_id)):
+                continue
+            scanned = self.scanned.setdefault(guild_id, {})
+            counts = self.counts.setdefault(guild_id, {})
+            segments = self._segments(guild_id)
+            for name in set(scanned) - set(segments):
+                del scanned[name]  # archived before the index was saved
+            for name in segments:
+                with open(os.path.join(self.directory, guild_id, name), "rb") as f:
+                    f.seek(scanned.get(name, 0))
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # torn write from a crash
+                        try:
+                            user_id = json.loads(line)["user"]
+                        except ValueError:
+                            continue
+                        counts[user_id] = counts.get(user_id, 0) + 1
+                    scanned[name] = f.tell()
+
+    def migrate_from_json(self, json_path):
+        """Move the legacy vent_submissions.json into segments, once.
+
+        Segments are built in a staging directory that is only marked
+        complete once fully written, then moved into place. A crash before
+        the marker restarts the migration from scratch; a crash after it
+        resumes the move. Either way no vent is written twice.
+        """
+        staging = os.path.join(self.directory, MIGRATION_STAGING_DIR)
+        complete_marker = os.path.join(staging, "complete")
+        if not os.path.exists(json_path):
+            # Finished earlier; only a leftover staging directory may remain
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        if not os.path.exists(complete_marker):
+            shutil.rmtree(staging, ignore_errors=True)
+            self._stage_migration(json_path, staging)
+            with open(complete_marker, "w") as f:
+                f.flush()
+                os.fsync(f.fileno())
+        self._commit_migration(staging)
+        # Count the moved-in segments from their scanned offsets, like any other catch-up
+        self._catch_up()
+        self.write(self.prepare())
+        os.replace(json_path, json_path + ".migrated")
+        shutil.rmtree(staging, ignore_errors=True)
+        print(f"Migrated vents from {json_path} into {self.directory}")
+
+    def _stage_migration(self, json_path, staging):
+        with open(json_path) as f:
+            legacy = json.load(f)
+        for guild_id, users in legacy.items():
+            guild_dir = os.path.join(staging, guild_id)
+            os.makedirs(guild_dir, exist_ok=True)
+            entries = sorted(
+                ((vent["timestamp"], user_id, vent["entry"]) for user_id, vents in users.items() for vent in vents),
+            )
+            files = {}
+            try:
+                for timestamp, user_id, entry in entries:
+                    segment = timestamp[:10] + ".jsonl"
+                    if segment not in files:
+                        files[segment] = open(os.path.join(guild_dir, segment), "wb")
+                    vent = {"user": user_id, "entry": entry, "timestamp": timestamp}
+                    files[segment].write(json.dumps(vent).encode("utf-8") + b"\n")
+                for f in files.values():
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                for f in files.values():
+                    f.close()
 
-def save_vent_submissions(data: dict):
-    with open(VENT_FILE, "w") as f:
-        json.dump(data, f)
+    def _commit_migration(self, staging):
+        """Move staged segments into the store; safe to rerun after a crash"""
+        for guild_id in os.listdir(staging):
+            staged_dir = os.path.join(staging, guild_id)
+            if not os.path.isdir(staged_dir):
+                continue
+            guild_dir = os.path.join(self.directory, guild_id)
+            if not os.path.exists(guild_dir):
+                os.replace(staged_dir, guild_dir)
+                continue
+            for name in sorted(os.listdir(staged_dir)):
+                staged = os.path.join(staged_dir, name)
+                target = os.path.join(guild_dir, name)
+                if not os.path.exists(target):
+                    os.replace(staged, target)
+                    continue
+                # A crash between this append and the remove below reruns it, so
+                # skip vents the target already holds
+                with open(target, "rb") as f:
+                    present = set(f.read().splitlines())
+                with open(staged, "rb") as fin, open(target, "ab") as fout:
+                    for line in fin:
+                        if line.rstrip(b"\n") not in present:
+                            fout.write(line)
+                    fout.flush()
+                    os.fsync(fout.fileno())
+                os.remove(staged)
+            os.rmdir(staged_dir)
+
+    def _write(self, guild_id, vent):
+        segment = vent["timestamp"][:10] + ".jsonl"
+        current = self._files.get(guild_id)
+        if current is None or current[0] != segment:
+            if current is not None:
+                self._retired.append(current[1])
+                self._unsynced.discard(current[1])
+            os.makedirs(os.path.join(self.directory, guild_id), exist_ok=True)
+            current = (segment, open(os.path.join(self.directory, guild_id, segment), "ab"))
+            self._files[guild_id] = current
+        f = current[1]
+        f.write(json.dumps(vent).encode("utf-8") + b"\n")
         f.flush()
-        os.fsync(f.fileno())
+        self._unsynced.add(f)
+        user_id = vent["user"]
+        counts = self.counts.setdefault(guild_id, {})
+        counts[user_id] = counts.get(user_id, 0) + 1
+        self.scanned.setdefault(guild_id, {})[segment] = f.tell()
+
+    def append(self, guild_id: str, user_id: str, entry: str):
+        self._write(guild_id, {
+            "user": user_id,
+            "entry": entry,
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+        })
+
+    def count(self, guild_id: str, user_id: str) -> int:
+        return self.counts.get(guild_id, {}).get(user_id, 0)
+
+    @property
+    def pending(self):
+        return bool(self._unsynced or self._retired or self._index_dirty)
+
+    def archive_candidates(self, today: datetime.date) -> List[Tuple[str, str]]:
+        """Hot segments past their guild's retention window (event loop)"""
+        open_segments = {(guild_id, name) for guild_id, (name, _) in self._files.items()}
+        candidates = []
+        for guild_id, segments in self.scanned.items():
+            days = vent_retention_days(guild_id)
+            if days <= 0:
+                continue
+            cutoff = (today - datetime.timedelta(days=days)).isoformat()
+            candidates.extend(
+                (guild_id, name) for name in segments
+                if name[:10] < cutoff and (guild_id, name) not in open_segments
+            )
+        return candidates
+
+    def archive(self, segments: List[Tuple[str, str]]):
+        """Compress segments into the guild's archive and remove them (worker thread).
+
+        Each segment is handled on its own, so one bad file doesn't hold up
+        the rest. Returns (done, errors): the segments that no longer need
+        archiving, and (segment, exception) for those that failed.
+        """
+        done, errors = [], []
+        for guild_id, name in segments:
+            src = os.path.join(self.directory, guild_id, name)
+            archive_dir = os.path.join(self.directory, guild_id, "archive")
+            dst = os.path.join(archive_dir, name + ARCHIVE_SUFFIX)
+            try:
+                if not os.path.exists(src):
+                    if not os.path.exists(dst):
+                        errors.append(((guild_id, name), FileNotFoundError(f"Vent segment missing: {src}")))
+                    # Archived by an earlier run, or lost; either way nothing is left to compress
+                    done.append((guild_id, name))
+                    continue
+                os.makedirs(archive_dir, exist_ok=True)
+                with open(src, "rb") as fin, open(dst + ".tmp", "wb") as raw:
+                    with open_archive_writer(raw) as fout:
+                        shutil.copyfileobj(fin, fout)
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                os.replace(dst + ".tmp", dst)
+                os.remove(src)
+                done.append((guild_id, name))
+            except OSError as e:
+                errors.append(((guild_id, name), e))
+        return done, errors
+
+    def forget(self, segments: List[Tuple[str, str]]):
+        """Drop archived segments from the index (event loop)"""
+        for guild_id, name in segments:
+            self.scanned.get(guild_id, {}).pop(name, None)
+        self._index_dirty = True
+
+    def prepare(self):
+        """Collect what the next write() needs (runs on the event loop)"""
+        unsynced, self._unsynced = self._unsynced, set()
+        retired, self._retired = self._retired, []
+        self._index_dirty = False
+        index = {
+            "counts": {g: dict(users) for g, users in self.counts.items()},
+            "scanned": {g: dict(segments) for g, segments in self.scanned.items()},
+        }
+        return unsynced, retired, index
+
+    def write(self, batch):
+        """fsync appended vents, then save the index (worker thread)"""
+        unsynced, retired, index = batch
+        for f in list(unsynced) + retired:
+            os.fsync(f.fileno())
+        for f in retired:
+            f.close()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        self.write(self.prepare())
+        for _, f in self._files.values():
+            f.close()
+
+vent_store = VentStore(VENT_DIR)
+vent_store.migrate_from_json(VENT_FILE)
 
-vent_data = load_vent_submissions()
+@tasks.loop(seconds=VENT_COMPACT_INTERVAL)
+async def compact_vents():
+    """Move vents past their retention window into compressed archives"""
+    try:
+        segments = vent_store.archive_candidates(datetime.datetime.utcnow().date())
+        if segments:
+            done, errors = await asyncio.to_thread(vent_store.archive, segments)
+            vent_store.forget(done)
+            if done:
+                await logger.log_bot_event("Vent Compaction", f"Archived {len(done)} vent segment(s)")
+            for (guild_id, name), error in errors:
+                await logger.log_error(error, "Vent Compaction Error", f"Guild: {guild_id}, Segment: {name}")
+    except Exception as e:
+        await logger.log_error(e, "Vent Compaction Error")
+
+@tasks.loop(seconds=VENT_FLUSH_INTERVAL)
+async def flush_vents():
+    """Batch vent fsyncs and index writes off the event loop"""
+    try:
+        if vent_store.pending:
+            with metrics.timer("pikabug_save_duration_seconds", target="vents"):
+                await asyncio.to_thread(vent_store.write, vent_store.prepare())
+    except Exception as e:
+        await logger.log_error(e, "Vent Flush Error")
 
 last_vent_message = None
 
@@ -1194,24 +3815,15 @@ async def venting(ctx, *, entry: str):
 
         guild_id = str(ctx.guild.id)
         user_id = str(ctx.author.id)
-        # Load or create user's vent list
-        if guild_id not in vent_data:
-            vent_data[guild_id] = {}
-        if user_id not in vent_data[guild_id]:
-            vent_data[guild_id][user_id] = []
         # Save the vent entry
-        vent_data[guild_id][user_id].append({
-            "entry": entry,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        })
-        save_vent_submissions(vent_data)
+        vent_store.append(guild_id, user_id, entry)
         # Award points
         record = get_user_record(guild_id, user_id)
         record['points'] += VENT_POINTS
         if 'vent_submissions' not in record:
             record['vent_submissions'] = 0
         record['vent_submissions'] += 1
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "vent", VENT_POINTS)
         await ctx.send(
             f"✅ Vent received! You earned **{VENT_POINTS}** PikaPoints.\n"
             f"• **Total Points:** {record['points']}\n"
@@ -1375,26 +3987,60 @@ async def before_send_hot_take():
 @bot.command(name='points', help='Display how many PikaPoints you have')
 async def points(ctx):
     try:
-        if os.path.exists(PIKA_FILE):
-            with open(PIKA_FILE, 'r') as f:
-                all_data = json.load(f)
-        else:
-            all_data = {}
+        user_record = get_user_view(str(ctx.guild.id), str(ctx.author.id))
+        user_points = user_record["points"]
 
-        guild_id_str = str(ctx.guild.id)
-        guild_data = all_data.get(guild_id_str, {})
-
-        user_id_str = str(ctx.author.id)
-        user_record = guild_data.get(user_id_str, {"points": 0})
-        user_points = user_record.get("points", 0) if isinstance(user_record, dict) else user_record
-
-        await ctx.send(f'{ctx.author.mention}, you have **{user_points}** PikaPoints!')
+        await ctx.send(
+            f"{ctx.author.mention}, you have **{user_points}** PikaPoints!\n"
+            f"• **Journal Entries:** {user_record['prompt_submissions']}\n"
+            f"• **Vent Submissions:** {user_record['vent_submissions']}\n"
+            f"• **Workshop Submissions:** {user_record['workshop_submissions']}\n"
+            f"• **Prefix-game Wins:** {user_record['prefixgame_submissions']}\n"
+            f"• **Unscramble Wins:** {user_record['unscramble_submissions']}\n"
+            f"• **Word Search Games Completed:** {user_record['wordsearch_submissions']}\n"
+            f"• **Rhyme Games Won:** {user_record['rhyme_submissions']}"
+        )
         await logger.log_command_usage(ctx, "points", success=True, extra_info=f"User has {user_points} points")
         
     except Exception as e:
         await logger.log_error(e, "Points Command Error")
         await logger.log_command_usage(ctx, "points", success=False)
 
+# ─── Leaderboard Command ─────────────────────────────────────────────
+
+LEADERBOARD_PAGE_SIZE = 10
+
+@bot.command(name='leaderboard', help='Show the PikaPoints leaderboard for this server')
+async def leaderboard(ctx, page: int = 1):
+    try:
+        board = get_leaderboard(str(ctx.guild.id))
+        if not len(board):
+            await ctx.send("Nobody has earned any PikaPoints yet!")
+            await logger.log_command_usage(ctx, "leaderboard", success=True, extra_info="Empty leaderboard")
+            return
+
+        page_count = (len(board) + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE
+        page = max(1, min(page, page_count))
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE
+
+        lines = [f"🏆 **PikaPoints Leaderboard** (page {page}/{page_count})"]
+        for position, (user_id, user_points) in enumerate(board.page(start, LEADERBOARD_PAGE_SIZE), start + 1):
+            lines.append(f"**#{position}** <@{user_id}> — **{user_points}** points")
+
+        rank = board.rank(str(ctx.author.id))
+        if rank is None:
+            lines.append(f"\n{ctx.author.mention}, you don't have any PikaPoints yet.")
+        else:
+            lines.append(f"\n{ctx.author.mention}, you are **#{rank}** of {len(board)}!")
+
+        # Show names without pinging everyone on the board
+        await ctx.send("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+        await logger.log_command_usage(ctx, "leaderboard", success=True, extra_info=f"Page {page}, rank {rank}")
+
+    except Exception as e:
+        await logger.log_error(e, "Leaderboard Command Error")
+        await logger.log_command_usage(ctx, "leaderboard", success=False)
+
 # ─── Admin Commands ─────────────────────────────────────────────────
 
 @bot.command(name='grantpoints')
@@ -1435,7 +4081,7 @@ async def grantpoints(ctx, user: discord.Member, points: int):
         record["admin_granted"] += points
         
         # Save to disk
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "grant", points, actor=str(ctx.author.id))
         
         # Send confirmation message
         await ctx.send(
@@ -1498,7 +4144,7 @@ async def removepoints(ctx, user: discord.Member, points: int):
         record["admin_removed"] += points
         
         # Save to disk
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "remove", -points, actor=str(ctx.author.id))
         
         # Send confirmation message
         await ctx.send(
@@ -1555,7 +4201,7 @@ async def setpoints(ctx, user: discord.Member, points: int):
         record["admin_set"] += 1
         
         # Save to disk
-        save_pikapoints(pika_data)
+        record_points_event(guild_id, user_id, "set", points - original_points, actor=str(ctx.author.id))
         
         # Send confirmation message
         await ctx.send(
@@ -1575,6 +4221,196 @@ async def setpoints(ctx, user: discord.Member, points: int):
         await logger.log_command_usage(ctx, "setpoints", success=False)
         await ctx.send("❌ An error occurred while setting points. Please try again.")
 
+@bot.command(name='chatusage')
+async def chatusage(ctx):
+    """Show current !chat rate-limit usage (Admin only)"""
+    try:
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ You need administrator permissions to use this command.")
+            await logger.log_command_usage(ctx, "chatusage", success=False, extra_info="Insufficient permissions")
+            return
+
+        def describe(scope, used):
+            parts = []
+            for label, value, limit in zip(("requests", "tokens"), used, CHAT_RATE_LIMITS[scope]):
+                if value is None:
+                    parts.append(f"{label}: unlimited")
+                else:
+                    parts.append(f"{label}: {max(0, round(value))}/{round(limit)}")
+            return " • ".join(parts)
+
+        lines = [
+            "🚦 **Chat usage (per minute)**",
+            f"**Global:** {describe('global', chat_rate_limiter.usage('global'))}",
+            f"**This server:** {describe('guild', chat_rate_limiter.usage('guild', ctx.guild.id))}",
+        ]
+        top = chat_rate_limiter.top_users(ctx.guild.id)
+        if top:
+            lines.append("**Busiest users:**")
+            for user_id, requests, tokens in top:
+                lines.append(f"• <@{user_id}> — {describe('user', (requests, tokens))}")
+        hits = chat_rate_limiter.hits
+        if hits:
+            lines.append("**Limit hits since startup:** " + ", ".join(
+                f"{scope} {action}: {count}" for (scope, action), count in sorted(hits.items())
+            ))
+
+        await ctx.send("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+        await logger.log_command_usage(ctx, "chatusage", success=True)
+
+    except Exception as e:
+        await logger.log_error(e, "Chat Usage Command Error")
+        await logger.log_command_usage(ctx, "chatusage", success=False)
+        await ctx.send("❌ An error occurred while fetching chat usage. Please try again.")
+
+def _format_seconds(seconds):
+    if seconds == float("inf"):
+        return f">{LATENCY_BUCKETS[-1]:g}s"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+
+@bot.command(name='pikastats')
+async def pikastats(ctx):
+    """Show command latency, error and throughput metrics (Admin only)"""
+    try:
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ You need administrator permissions to use this command.")
+            await logger.log_command_usage(ctx, "pikastats", success=False, extra_info="Insufficient permissions")
+            return
+
+        uptime = time.time() - metrics.started
+        minutes = max(uptime / 60, 1 / 60)
+        errors = metrics.counters("pikabug_command_errors_total", by=("command",))
+        guild_errors = metrics.counters("pikabug_command_errors_total", by=("command", "guild"))
+
+        def command_lines(histograms, error_counts, limit):
+            ranked = sorted(histograms.items(), key=lambda item: item[1].count, reverse=True)[:limit]
+            return [
+                f"• `!{key[0]}` — {h.count} calls ({h.count / minutes:.2f}/min), "
+                f"p50 {_format_seconds(h.quantile(0.5))}, p95 {_format_seconds(h.quantile(0.95))}, "
+                f"errors {int(error_counts.get(key, 0))}"
+                for key, h in ranked
+            ]
+
+        lines = [f"📊 **Pikabug stats** (up {datetime.timedelta(seconds=int(uptime))})", "**Commands (all servers):**"]
+        lines += command_lines(metrics.histograms("pikabug_command_duration_seconds", by=("command",)), errors, 10) or ["• none yet"]
+
+        guild = guild_label(ctx.guild)
+        this_guild = {
+            (command,): h
+            for (command, g), h in metrics.histograms("pikabug_command_duration_seconds", by=("command", "guild")).items()
+            if g == guild
+        }
+        this_guild_errors = {(command,): n for (command, g), n in guild_errors.items() if g == guild}
+        lines.append("**This server:**")
+        lines += command_lines(this_guild, this_guild_errors, 5) or ["• none yet"]
+
+        on_message = metrics.histograms("pikabug_on_message_duration_seconds").get((), Histogram())
+        lines.append(
+            f"**Message handler:** {on_message.count} messages, "
+            f"p50 {_format_seconds(on_message.quantile(0.5))}, p95 {_format_seconds(on_message.quantile(0.95))}"
+        )
+
+        lag = metrics.histograms("pikabug_loop_lag_seconds").get((), Histogram())
+        lines.append(
+            f"**Event loop lag:** p50 {_format_seconds(lag.quantile(0.5))}, p99 {_format_seconds(lag.quantile(0.99))}, "
+            f"{loop_watchdog.stalls} stalls over {_format_seconds(LOOP_LAG_THRESHOLD)}"
+        )
+
+        saves = metrics.histograms("pikabug_save_duration_seconds", by=("target",))
+        if saves:
+            lines.append("**Disk writes:** " + ", ".join(
+                f"{target} {h.count}× p95 {_format_seconds(h.quantile(0.95))}"
+                for (target,), h in sorted(saves.items())
+            ))
+
+        attempts = metrics.histograms("pikabug_llm_attempt_duration_seconds", by=("outcome",))
+        replies = metrics.histograms("pikabug_llm_reply_duration_seconds").get((), Histogram())
+        ok, failed = attempts.get(("ok",), Histogram()), attempts.get(("error",), Histogram())
+        lines.append(
+            f"**Chat model:** {ok.count} ok / {failed.count} failed attempts, "
+            f"first token p95 {_format_seconds(ok.quantile(0.95))}, "
+            f"full reply p95 {_format_seconds(replies.quantile(0.95))}, "
+            f"circuit {chat_provider.breaker.state}"
+        )
+        memory = conversation_history.stats()
+        lines.append(
+            f"**Chat memory:** {memory['conversations']} conversations, {memory['tokens']} tokens, "
+            f"{memory['hits']} hits / {memory['misses']} misses, evictions {memory['evictions'] or 0}"
+        )
+
+        await ctx.send("\n".join(lines)[:DISCORD_MESSAGE_LIMIT])
+        await logger.log_command_usage(ctx, "pikastats", success=True)
+
+    except Exception as e:
+        await logger.log_error(e, "Stats Command Error")
+        await logger.log_command_usage(ctx, "pikastats", success=False)
+        await ctx.send("❌ An error occurred while fetching stats. Please try again.")
+
+# Longest !pikaprofile session an admin can ask for, in seconds
+PROFILE_MAX_SECONDS = int(os.getenv("PIKA_PROFILE_MAX_SECONDS", "120"))
+PROFILE_TOP_FUNCTIONS = 20
+profile_lock = asyncio.Lock()
+
+def summarize_profile(profiler, path):
+    """Dump profiler stats to path and return the top functions by cumulative time as text"""
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(path)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+    lines = [f"{'cumtime':>8} {'tottime':>8} {'calls':>8}  function"]
+    for (filename, lineno, name), (_, calls, tottime, cumtime, _) in rows:
+        where = f" ({os.path.basename(filename)}:{lineno})" if lineno else ""
+        lines.append(f"{cumtime:8.3f} {tottime:8.3f} {calls:>8}  {name}{where}")
+    return "\n".join(lines)
+
+@bot.command(name='pikaprofile')
+async def pikaprofile(ctx, seconds: int = 30):
+    """Profile the event loop thread for a while and post the results (Admin only)"""
+    try:
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ You need administrator permissions to use this command.")
+            await logger.log_command_usage(ctx, "pikaprofile", success=False, extra_info="Insufficient permissions")
+            return
+
+        if profile_lock.locked():
+            await ctx.send("⏳ A profiling session is already running. Try again when it finishes.")
+            await logger.log_command_usage(ctx, "pikaprofile", success=False, extra_info="Session already running")
+            return
+
+        seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+        async with profile_lock:
+            profiler = cProfile.Profile()
+            try:
+                # Profiles this thread, which is the one running the event loop
+                profiler.enable()
+            except ValueError as e:
+                await ctx.send(f"❌ Couldn't start the profiler: {e}")
+                await logger.log_command_usage(ctx, "pikaprofile", success=False, extra_info=str(e))
+                return
+            await ctx.send(f"🔬 Profiling for {seconds}s...")
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+
+            with tempfile.TemporaryDirectory() as tmp:
+                filename = f"pikabug-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}.prof"
+                path = os.path.join(tmp, filename)
+                summary = await asyncio.to_thread(summarize_profile, profiler, path)
+                header = f"🔬 **Profile of the last {seconds}s** (top {PROFILE_TOP_FUNCTIONS} by cumulative time)\n"
+                footer = "\nOpen the attachment with `snakeviz` or `python -m pstats` for the full profile or a flame graph."
+                room = DISCORD_MESSAGE_LIMIT - len(header) - len(footer) - len("```\n\n```")
+                await ctx.send(
+                    f"{header}```\n{summary[:room]}\n```{footer}",
+                    file=discord.File(path, filename=filename),
+                )
+
+        await logger.log_command_usage(ctx, "pikaprofile", success=True, extra_info=f"{seconds}s session")
+
+    except Exception as e:
+        await logger.log_error(e, "Profile Command Error")
+        await logger.log_command_usage(ctx, "pikaprofile", success=False)
+        await ctx.send("❌ An error occurred while profiling. Please try again.")
+
 # ─── Help Command ─────────────────────────────────────────────────
 
 @bot.command(name="pikahelp")
@@ -1584,12 +4420,13 @@ async def pikahelp_command(ctx):
 🧠 **Pikabug Commands**:
 
 `!pikahelp` - Show list of Pikabug's commands.
-`!chat` - Triggers AI chat with Pikabug. Trained to make you laugh or comfort you during tough times. Memory lasts for current session only (up to 50 messages).
+`!chat` - Triggers AI chat with Pikabug. Trained to make you laugh or comfort you during tough times. Memory lasts for current session only; older messages are summarized.
 `!prompt` - Sends a journal prompt/question to answer to help with mindfulness. Submissions are rewarded with PikaPoints!
 `!write` - Submits your response to the journal prompt/question. Insert it before your answer.
 `!vent` - Vent, rant, and complain to Pikabug. This command gets Pika's attention first. Doing so gets you PikaPoints!
 `!venting` - Submit your vent to Pikabug for PikaPoints.
 `!points` - View how many PikaPoints you get from activity submissions.
+`!leaderboard [page]` - See the server's PikaPoints leaderboard and your rank.
 `!comfort` — Get a general comfort and support message.
 `!suicidal` — Get compassionate support for suicidal thoughts.  
 `!anxious` — Get calming and supportive messages for anxiety.  
@@ -1608,6 +4445,9 @@ async def pikahelp_command(ctx):
 `!grantpoints @user [amount]` - Grant PikaPoints to a user (max 1000 at once).
 `!removepoints @user [amount]` - Remove PikaPoints from a user (max 1000 at once).
 `!setpoints @user [amount]` - Set a user's PikaPoints to a specific amount (max 10,000).
+`!chatusage` - Show current `!chat` rate-limit usage and limit hits.
+`!pikastats` - Show command latency, error and throughput stats.
+`!pikaprofile [seconds]` - Profile the bot for a while (default 30s, max 120s) and post the hottest functions.
 """
         await ctx.send(pikahelp_text)
         await logger.log_command_usage(ctx, "pikahelp", success=True)
@@ -1616,7 +4456,101 @@ async def pikahelp_command(ctx):
         await logger.log_error(e, "Help Command Error")
         await logger.log_command_usage(ctx, "pikahelp", success=False)
 
+# ─── Chat Benchmark ─────────────────────────────────────────────────
+
+class _BenchMessage:
+    """Stands in for a Discord message so replies can stream without a gateway"""
+    def __init__(self, content):
+        self.content = content
+
+    async def edit(self, content):
+        self.content = content
+
+async def _bench_send(content):
+    return _BenchMessage(content)
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def bench_chat(requests, concurrency, guilds=8):
+    """Push simulated !chat requests through the limiter, provider and streaming reply.
+
+    Point PIKA_LLM_BASE_URL at fake_llm_server.py to measure throughput and
+    tail latency without network access or API spend.
+    """
+    await load_token_encoding()
+    waits, first_tokens, totals = [], [], []
+    errors: Dict[str, int] = defaultdict(int)
+    pending = iter(range(requests))
+
+    async def one(i):
+        started = time.perf_counter()
+        reply = StreamingReply(_BenchMessage("Thinking..."), _bench_send)
+        messages = Conversation(f"bench-{i}").build_messages(f"benchmark prompt {i}")
+        try:
+            async with chat_limiter.slot(i % guilds, timeout=CHAT_QUEUE_TIMEOUT):
+                admitted = time.perf_counter()
+                waits.append(admitted - started)
+                reply.start()
+                first = None
+                async for delta in chat_provider.stream(messages):
+                    if first is None:
+                        first = time.perf_counter()
+                        first_tokens.append(first - started)
+                    reply.feed(delta)
+            await reply.finish()
+            totals.append(time.perf_counter() - started)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            await reply.abort(str(e))
+
+    async def worker():
+        for i in pending:
+            await one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{requests} requests, concurrency {concurrency}, {elapsed:.2f}s, "
+          f"{len(totals) / elapsed:.1f} req/s, {sum(errors.values())} errors")
+    if errors:
+        print("      errors: " + ", ".join(f"{name} {count}" for name, count in sorted(errors.items())))
+    breaker = getattr(chat_provider, "breaker", None)
+    if breaker is not None:
+        print(f"     circuit: {breaker.state}, {chat_provider.retries} retries")
+    for name, values in (("queue wait", waits), ("first token", first_tokens), ("total", totals)):
+        print(f"{name:>12}: p50 {_percentile(values, 0.5) * 1000:.0f}ms  "
+              f"p95 {_percentile(values, 0.95) * 1000:.0f}ms  "
+              f"p99 {_percentile(values, 0.99) * 1000:.0f}ms  "
+              f"max {max(values, default=0) * 1000:.0f}ms")
+
 # ─── Bot Startup ─────────────────────────────────────────────────
 
+def _handle_sigterm(signum, frame):
+    # bot.run treats KeyboardInterrupt as a clean shutdown
+    raise KeyboardInterrupt
+
+signal.signal(signal.SIGTERM, _handle_sigterm)
+
+# python pika_bot.py --bench-chat [requests] [concurrency]
+if "--bench-chat" in sys.argv:
+    bench_args = [int(a) for a in sys.argv[sys.argv.index("--bench-chat") + 1:][:2]]
+    asyncio.run(bench_chat(*(bench_args + [200, 20][len(bench_args):])))
+    sys.exit(0)
+
 # Run the bot
-bot.run(os.getenv("DISCORD_TOKEN"))
+try:
+    bot.run(os.getenv("DISCORD_TOKEN"))
+finally:
+    # Fold anything still in the ledger into a final snapshot
+    points_writer.flush_sync()
+    points_ledger.close()
+    points_backend.close()
+    vent_store.close()
+    loop_watchdog.stop()
+    if log_listener is not None:
+        log_listener.stop()